@@ -0,0 +1,147 @@
+"""Query the asset registry only once the paths a job needs are indexed."""
+
+import traceback
+
+import unreal
+
+
+class AssetRegistryAccess(object):
+    """Class used to make sure the paths a query reads are scanned before the query runs.
+
+    Query results are only cached between :meth:`beginBatch` and :meth:`endBatch`, the instance lives as long as the
+    editor and artists change content under it that a longer lived cache could not see.
+    """
+
+    def __init__(self):
+        self.asset_registry = unreal.AssetRegistryHelpers.get_asset_registry()
+        self.ready_paths = set()
+        self.pending_callbacks = []
+        self.tick_handle = None
+        self.query_cache = None
+
+    def beginBatch(self):
+        """Start caching query results, repeated queries of a batch run are answered without the registry."""
+        self.query_cache = {}
+
+    def endBatch(self):
+        """Stop caching and throw the cached results away, the next batch has to see content changed in between."""
+        self.query_cache = None
+
+    def isPathReady(self, package_path):
+        """Check whether queries under a path can be trusted.
+
+        :param package_path: Content path, '/Game/Characters' for example.
+        :type package_path: str
+
+        :return: True once the path was scanned or the initial scan of the whole registry finished.
+        :rtype: bool
+        """
+        return package_path in self.ready_paths or not self.asset_registry.is_loading_assets()
+
+    def scanPath(self, package_path):
+        """Scan a single path right away instead of waiting for the initial scan to reach it.
+
+        :param package_path: Content path to scan.
+        :type package_path: str
+        """
+        self.asset_registry.scan_paths_synchronous([package_path], force_rescan=False)
+        self.ready_paths.add(package_path)
+
+    def ensurePathsReady(self, package_paths):
+        """Block until the given paths are indexed, only the paths themselves are scanned and not the whole project.
+
+        Used headless and for remote jobs, where the caller has to see the job finish or fail.
+
+        :param package_paths: Content paths the next queries read.
+        :type package_paths: list of str
+        """
+        for package_path in package_paths:
+            if not self.isPathReady(package_path):
+                self.scanPath(package_path)
+
+    def whenPathsReady(self, package_paths, callback):
+        """Call back once the given paths are indexed without blocking the editor.
+
+        The paths are moved to the front of the initial scan and then scanned one per editor tick, so a job starts as
+        soon as its own paths are indexed while the rest of the project keeps scanning in the background.
+
+        :param package_paths: Content paths the job reads.
+        :type package_paths: list of str
+
+        :param callback: Called without arguments once every path is ready, on a later editor tick unless the paths
+            are ready already. Errors it raises are logged, the caller has to report them itself.
+        :type callback: callable
+        """
+        pending_paths = [package_path for package_path in package_paths if not self.isPathReady(package_path)]
+        if not pending_paths:
+            callback()
+            return
+        for package_path in pending_paths:
+            self.asset_registry.prioritize_search_path(package_path)
+        self.pending_callbacks.append((pending_paths, callback))
+        if self.tick_handle is None:
+            self.tick_handle = unreal.register_slate_post_tick_callback(self.onTick)
+
+    def onTick(self, delta_time):
+        """Scan one pending path per tick and run the callbacks whose paths are all ready.
+
+        :param delta_time: Seconds since the last tick.
+        :type delta_time: float
+        """
+        pending_callbacks = []
+        ready_callbacks = []
+        scanned = False
+        for pending_paths, callback in self.pending_callbacks:
+            pending_paths = [package_path for package_path in pending_paths if not self.isPathReady(package_path)]
+            if pending_paths and not scanned:
+                self.scanPath(pending_paths.pop(0))
+                scanned = True
+            if pending_paths:
+                pending_callbacks.append((pending_paths, callback))
+            else:
+                ready_callbacks.append(callback)
+        self.pending_callbacks = pending_callbacks
+        if not self.pending_callbacks:
+            unreal.unregister_slate_post_tick_callback(self.tick_handle)
+            self.tick_handle = None
+        for callback in ready_callbacks:
+            # An error here would only end up in the tick, log it and keep the other callbacks running
+            try:
+                callback()
+            except Exception:
+                unreal.log_error(traceback.format_exc())
+
+    def getAssets(self, package_paths, class_names=None, recursive_paths=False, recursive_classes=False):
+        """Query the asset registry once the paths it searches are indexed.
+
+        :param package_paths: Content paths to search, scanned first if the registry has not reached them yet.
+        :type package_paths: list of str
+
+        :param class_names: Only return assets of these classes.
+        :type class_names: list of str
+
+        :param recursive_paths: Also search the sub folders of the paths.
+        :type recursive_paths: bool
+
+        :param recursive_classes: Also return assets of classes derived from the classes.
+        :type recursive_classes: bool
+
+        :return: Asset data of every matching asset, from the cache when a batch already ran the same query.
+        :rtype: list of :class:`unreal.AssetData`
+        """
+        query_key = (tuple(package_paths), tuple(class_names or []), recursive_paths, recursive_classes)
+        if self.query_cache is not None and query_key in self.query_cache:
+            return list(self.query_cache[query_key])
+        self.ensurePathsReady(package_paths)
+        asset_filter = unreal.ARFilter(
+            class_names=class_names or [],
+            package_paths=package_paths,
+            recursive_paths=recursive_paths,
+            recursive_classes=recursive_classes
+        )
+        assets = list(self.asset_registry.get_assets(asset_filter))
+        if self.query_cache is not None:
+            self.query_cache[query_key] = assets
+        return list(assets)
+
+asset_registry_access = AssetRegistryAccess()
@@ -0,0 +1,254 @@
+"""Keep long batch runs inside a memory budget by unloading what every job loaded and collecting garbage between jobs."""
+
+import os
+import sys
+import threading
+
+import unreal
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+BYTES_PER_MB = 1024.0 * 1024.0
+
+
+def get_rss_bytes():
+    """Get the resident memory of the editor process.
+
+    :return: Resident set size in bytes, None if it can not be read on this platform.
+    :rtype: int
+    """
+    if psutil:
+        return psutil.Process().memory_info().rss
+    if sys.platform.startswith('linux'):
+        with open('/proc/self/statm', 'r') as statm_file:
+            return int(statm_file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    return None
+
+
+def get_peak_rss_bytes():
+    """Get the peak resident memory the kernel recorded since the last :func:`reset_peak_rss`.
+
+    :return: Peak resident set size in bytes, None if the platform does not record it.
+    :rtype: int
+    """
+    if not sys.platform.startswith('linux'):
+        return None
+    with open('/proc/self/status', 'r') as status_file:
+        for line in status_file:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) * 1024
+    return None
+
+
+def reset_peak_rss():
+    """Reset the kernel's peak resident memory counter so it only covers the next job, Linux only."""
+    if not sys.platform.startswith('linux'):
+        return
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs_file:
+            clear_refs_file.write('5')
+    except (IOError, OSError):
+        pass
+
+
+def get_loaded_package_names(package_prefixes):
+    """Get the names of every loaded content package.
+
+    :param package_prefixes: Only packages starting with one of these are returned, engine and script packages
+        should never be unloaded.
+    :type package_prefixes: tuple of str
+
+    :return: Loaded package names.
+    :rtype: set of str
+    """
+    loaded_package_names = set()
+    for package in unreal.ObjectIterator(unreal.Package):
+        package_name = str(package.get_name())
+        if package_name.startswith(package_prefixes):
+            loaded_package_names.add(package_name)
+    return loaded_package_names
+
+
+def get_package_dependencies(package_names, package_prefixes=('/Game/',)):
+    """Get packages together with every package they hard reference, following references all the way down.
+
+    :param package_names: Names of the packages to start from.
+    :type package_names: list of str
+
+    :param package_prefixes: Only references starting with one of these are followed.
+    :type package_prefixes: tuple of str
+
+    :return: The packages and their dependencies.
+    :rtype: set of str
+    """
+    asset_registry = unreal.AssetRegistryHelpers.get_asset_registry()
+    dependency_options = unreal.AssetRegistryDependencyOptions(
+        include_soft_package_references=False,
+        include_hard_package_references=True,
+        include_searchable_names=False,
+        include_soft_management_references=False,
+        include_hard_management_references=False
+    )
+    dependency_names = set()
+    pending_package_names = list(package_names)
+    while pending_package_names:
+        package_name = pending_package_names.pop()
+        if package_name in dependency_names:
+            continue
+        dependency_names.add(package_name)
+        for dependency_name in asset_registry.get_dependencies(package_name, dependency_options) or []:
+            dependency_name = str(dependency_name)
+            if dependency_name.startswith(tuple(package_prefixes)) and dependency_name not in dependency_names:
+                pending_package_names.append(dependency_name)
+    return dependency_names
+
+
+class RssSampler(object):
+    """Sample resident memory on a background thread, used where the kernel does not keep a resettable peak."""
+
+    def __init__(self, interval=0.25):
+        """
+        :param interval: Seconds between samples.
+        :type interval: float
+        """
+        self.interval = interval
+        self.peak_rss_bytes = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def sample(self):
+        """Record the current resident memory if it is the highest seen so far."""
+        rss_bytes = get_rss_bytes()
+        if rss_bytes and rss_bytes > self.peak_rss_bytes:
+            self.peak_rss_bytes = rss_bytes
+
+    def run(self):
+        """Sample until stopped."""
+        while not self.stop_event.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        """Start sampling from zero."""
+        self.peak_rss_bytes = 0
+        self.stop_event.clear()
+        self.sample()
+        self.thread = threading.Thread(target=self.run, name='RssSampler')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """Stop sampling and take one last sample.
+
+        :return: Highest resident memory seen while sampling, in bytes.
+        :rtype: int
+        """
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+        self.sample()
+        return self.peak_rss_bytes
+
+
+class BatchMemoryManager(object):
+    """Class used to track the packages every batch job loads and release them once the job is done."""
+
+    def __init__(self, memory_ceiling_mb=None, unload_between_jobs=True, package_prefixes=('/Game/',)):
+        """
+        :param memory_ceiling_mb: Resident memory above which packages are unloaded and garbage is collected even
+            when ``unload_between_jobs`` is off, and checked between targets of a fan out.
+        :type memory_ceiling_mb: float
+
+        :param unload_between_jobs: Unload what a job loaded and collect garbage after every job.
+        :type unload_between_jobs: bool
+
+        :param package_prefixes: Only packages starting with one of these are tracked and unloaded.
+        :type package_prefixes: tuple of str
+        """
+        self.memory_ceiling_mb = memory_ceiling_mb
+        self.unload_between_jobs = unload_between_jobs
+        self.package_prefixes = tuple(package_prefixes)
+        self.rss_sampler = RssSampler()
+        self.job_package_names = set()
+
+    def isOverCeiling(self):
+        """Check the editor process against the memory ceiling.
+
+        :return: True if a ceiling is set and resident memory is above it.
+        :rtype: bool
+        """
+        if not self.memory_ceiling_mb:
+            return False
+        rss_bytes = get_rss_bytes()
+        return bool(rss_bytes) and rss_bytes / BYTES_PER_MB > self.memory_ceiling_mb
+
+    def beginJob(self):
+        """Remember what was loaded before the job and start tracking its peak memory."""
+        self.packages_before_job = get_loaded_package_names(self.package_prefixes)
+        self.job_package_names = set()
+        reset_peak_rss()
+        self.rss_sampler.start()
+
+    def unloadPackages(self, package_names):
+        """Unload packages and collect garbage, dirty packages are left alone so no unsaved work is lost.
+
+        :param package_names: Names of the packages to unload.
+        :type package_names: set of str
+
+        :return: Names of the packages that were unloaded.
+        :rtype: list of str
+        """
+        dirty_package_names = set(str(package.get_name()) for package in unreal.EditorLoadingAndSavingUtils.get_dirty_content_packages())
+        packages_to_unload = [
+            package for package in unreal.ObjectIterator(unreal.Package)
+            if str(package.get_name()) in package_names and str(package.get_name()) not in dirty_package_names
+        ]
+        unloaded_package_names = sorted(str(package.get_name()) for package in packages_to_unload)
+        if packages_to_unload:
+            unreal.EditorLoadingAndSavingUtils.unload_packages(packages_to_unload)
+        # Drop the python references before collecting so the unloaded objects can actually be freed
+        del packages_to_unload
+        unreal.SystemLibrary.collect_garbage()
+        return unloaded_package_names
+
+    def collectIfOverCeiling(self, keep_package_names=()):
+        """Release what the current job loaded so far if the ceiling was hit, used between steps of one long job.
+
+        :param keep_package_names: Packages that must stay loaded, the fan out source animations for example.
+        :type keep_package_names: list of str
+
+        :return: Names of the packages that were unloaded.
+        :rtype: list of str
+        """
+        if not self.isOverCeiling():
+            return []
+        package_names = get_loaded_package_names(self.package_prefixes) - self.packages_before_job - set(keep_package_names)
+        self.job_package_names.update(package_names)
+        unloaded_package_names = self.unloadPackages(package_names)
+        unreal.log_warning('Memory ceiling of {} MB hit, unloaded {} packages'.format(self.memory_ceiling_mb, len(unloaded_package_names)))
+        return unloaded_package_names
+
+    def endJob(self):
+        """Stop tracking the job, release what it loaded when asked to or when over the ceiling and report on it.
+
+        :return: Peak and final resident memory in MB, the packages the job loaded and the ones that were unloaded.
+        :rtype: dict
+        """
+        sampled_peak_rss_bytes = self.rss_sampler.stop()
+        peak_rss_bytes = max(sampled_peak_rss_bytes, get_peak_rss_bytes() or 0)
+        self.job_package_names.update(get_loaded_package_names(self.package_prefixes) - self.packages_before_job)
+
+        unloaded_package_names = []
+        if self.unload_between_jobs or self.isOverCeiling():
+            unloaded_package_names = self.unloadPackages(self.job_package_names)
+        rss_bytes = get_rss_bytes()
+        return {
+            'peak_rss_mb': round(peak_rss_bytes / BYTES_PER_MB, 1) if peak_rss_bytes else None,
+            'rss_after_mb': round(rss_bytes / BYTES_PER_MB, 1) if rss_bytes else None,
+            'packages_loaded': len(self.job_package_names),
+            'packages_unloaded': len(unloaded_package_names),
+        }
@@ -0,0 +1,296 @@
+"""Check chain and goal detection against a golden corpus of real skeletons and enforce per skeleton time budgets.
+
+Runs offline with a stand in ``unreal`` module, so it works from any Python 3 outside the editor::
+
+    python check_chain_detection.py
+    python check_chain_detection.py --update
+    python check_chain_detection.py --add "Pv4Test" bones.txt --time-budget-ms 5
+
+Every ``chain_detection_corpus/*.json`` file holds the bone names of one skeleton, in hierarchy order as
+``create_ik_rig.get_all_bones`` returns them, with the chains and goals detection is expected to produce. A chain or
+goal detection can not resolve is recorded as the exception it raises, so a change that makes a failing skeleton work
+shows up as a difference too. After an intended change to the heuristics, review the differences and rerun with
+``--update`` to accept them.
+
+The exit code is 1 when any skeleton differs from its expected outputs or overruns its time budget.
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+import types
+
+
+CORPUS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chain_detection_corpus')
+DEFAULT_TIME_BUDGET_MS = 5.0
+
+
+class FakeUnrealObject(object):
+    """Stands in for any editor object, every attribute and call returns another stand in."""
+
+    def __getattr__(self, name):
+        return FakeUnrealObject()
+
+    def __call__(self, *args, **kwargs):
+        return FakeUnrealObject()
+
+
+class FakeIKRigController(object):
+    """Records the goals detection adds instead of writing them to an IKRig uasset."""
+
+    def __init__(self):
+        self.goal_bones = {}
+        self.chain_goals = {}
+
+    def add_new_goal(self, goal_name, bone_name):
+        self.goal_bones[goal_name] = bone_name
+
+    def set_retarget_chain_goal(self, chain_name, goal_name):
+        self.chain_goals[goal_name] = chain_name
+
+    def get_goal_bone(self, goal_name):
+        return self.goal_bones[goal_name]
+
+
+def install_fake_unreal():
+    """Register a stand in ``unreal`` module when the real one is not available."""
+    try:
+        import unreal
+    except ImportError:
+        fake_unreal = types.ModuleType('unreal')
+        fake_unreal.__getattr__ = lambda name: FakeUnrealObject()
+        # Detection only logs through these, keep the output of the check readable
+        fake_unreal.log = fake_unreal.log_warning = fake_unreal.log_error = lambda message: None
+        sys.modules['unreal'] = fake_unreal
+
+
+def get_error_name(error):
+    """Describe a detection failure without its message, messages differ between Python versions.
+
+    :param error: Exception raised by detection.
+    :type error: Exception
+
+    :return: Exception class name.
+    :rtype: str
+    """
+    return 'error: {}'.format(type(error).__name__)
+
+
+def detect_chains_and_goals(unique_bone_names):
+    """Run chain and goal detection in the same order :class:`create_ik_rig.CreateIKRig` does.
+
+    Every chain and goal is resolved on its own so one that fails does not hide the results of the others.
+
+    :param unique_bone_names: Bone names of the skeleton.
+    :type unique_bone_names: list of str
+
+    :return: Chain key to its chain dict or error, and goal key to its goal bone and chain or error.
+    :rtype: dict
+    """
+    import create_ik_rig as ddcir
+
+    chain_requests = [
+        ('{}:{}'.format(rig_side, chain_choice), rig_side, chain_choice)
+        for chain_choice in ddcir.MULTI_SIDE_CHAIN_CHOICES
+        for rig_side in ddcir.RIG_SIDES
+    ]
+    chain_requests.extend((chain_choice, ddcir.RIG_SIDES[-1], chain_choice) for chain_choice in ddcir.CENTER_CHAIN_CHOICES)
+    chains = {}
+    for chain_key, rig_side, chain_choice in chain_requests:
+        try:
+            chains[chain_key] = ddcir.create_chain_dict(rig_side=rig_side, chain_choice=chain_choice, unique_bone_names=unique_bone_names)
+        except Exception as error:
+            chains[chain_key] = get_error_name(error)
+
+    goals = {}
+    for rig_side in ddcir.RIG_SIDES:
+        for end_goal, chain_choice in ddcir.END_GOAL_CHAIN_CHOICES:
+            goal_key = '{}:{}'.format(rig_side, end_goal)
+            ik_rig_controller = FakeIKRigController()
+            try:
+                ik_goal_name = ddcir.create_ik_goal(
+                    rig_side=rig_side,
+                    end_goal=end_goal,
+                    chain_choice=chain_choice,
+                    ik_rig_controller=ik_rig_controller,
+                    unique_bone_names=unique_bone_names
+                )
+            except Exception as error:
+                goals[goal_key] = get_error_name(error)
+                continue
+            goals[goal_key] = {
+                'goal_name': ik_goal_name,
+                'bone_name': ik_rig_controller.get_goal_bone(ik_goal_name),
+                'chain_name': ik_rig_controller.chain_goals[ik_goal_name],
+            }
+    return {'chains': chains, 'goals': goals}
+
+
+def time_detection(unique_bone_names, repeat=5, number=10):
+    """Time detection for one skeleton, the best of several runs keeps the number stable on a busy machine.
+
+    :param unique_bone_names: Bone names of the skeleton.
+    :type unique_bone_names: list of str
+
+    :param repeat: Number of timed runs.
+    :type repeat: int
+
+    :param number: Number of detections per timed run.
+    :type number: int
+
+    :return: Milliseconds a single detection took.
+    :rtype: float
+    """
+    timings = timeit.repeat(lambda: detect_chains_and_goals(unique_bone_names), repeat=repeat, number=number)
+    return min(timings) / number * 1000.0
+
+
+def get_differences(expected, detected):
+    """List every chain and goal whose detected value does not match the expected one.
+
+    :param expected: Expected outputs of the corpus entry.
+    :type expected: dict
+
+    :param detected: Outputs returned by :func:`detect_chains_and_goals`.
+    :type detected: dict
+
+    :return: Readable differences, empty when everything matches.
+    :rtype: list of str
+    """
+    differences = []
+    for section in ('chains', 'goals'):
+        expected_section = expected.get(section, {})
+        detected_section = detected[section]
+        for key in sorted(set(expected_section) | set(detected_section)):
+            if expected_section.get(key) != detected_section.get(key):
+                differences.append('{} {}: expected {}, got {}'.format(
+                    section[:-1],
+                    key,
+                    json.dumps(expected_section.get(key), sort_keys=True),
+                    json.dumps(detected_section.get(key), sort_keys=True)
+                ))
+    return differences
+
+
+def load_corpus(corpus_folder=CORPUS_FOLDER):
+    """Read every skeleton of the corpus.
+
+    :param corpus_folder: Folder holding the corpus json files.
+    :type corpus_folder: str
+
+    :return: Filepath to corpus entry, sorted by filepath.
+    :rtype: list of tuple
+    """
+    corpus = []
+    for filename in sorted(os.listdir(corpus_folder)):
+        if filename.endswith('.json'):
+            corpus_path = os.path.join(corpus_folder, filename)
+            with open(corpus_path, 'r') as corpus_file:
+                corpus.append((corpus_path, json.load(corpus_file)))
+    return corpus
+
+
+def write_corpus_entry(corpus_path, corpus_entry):
+    """Write a corpus entry with a stable layout so updates produce small diffs.
+
+    :param corpus_path: Filepath of the corpus json file.
+    :type corpus_path: str
+
+    :param corpus_entry: Name, source, time budget, bone names and expected outputs of a skeleton.
+    :type corpus_entry: dict
+    """
+    with open(corpus_path, 'w') as corpus_file:
+        json.dump(corpus_entry, corpus_file, indent=4, sort_keys=True)
+        corpus_file.write('\n')
+
+
+def add_skeleton(name, bones_path, time_budget_ms, source='', corpus_folder=CORPUS_FOLDER):
+    """Add a skeleton to the corpus with the outputs detection currently produces as its expected outputs.
+
+    :param name: Readable name of the skeleton, also used for the filename.
+    :type name: str
+
+    :param bones_path: Text file with one bone name per line in hierarchy order.
+    :type bones_path: str
+
+    :param time_budget_ms: Milliseconds detection may take for this skeleton.
+    :type time_budget_ms: float
+
+    :param source: Where the bone names come from.
+    :type source: str
+
+    :return: Filepath of the new corpus entry.
+    :rtype: str
+    """
+    with open(bones_path, 'r') as bones_file:
+        unique_bone_names = [line.strip() for line in bones_file if line.strip()]
+    corpus_entry = {
+        'name': name,
+        'source': source,
+        'time_budget_ms': time_budget_ms,
+        'bones': unique_bone_names,
+        'expected': detect_chains_and_goals(unique_bone_names),
+    }
+    corpus_path = os.path.join(corpus_folder, name.lower().replace(' ', '_') + '.json')
+    write_corpus_entry(corpus_path, corpus_entry)
+    return corpus_path
+
+
+def main(update=False, budget_scale=1.0, corpus_folder=CORPUS_FOLDER):
+    """Check every skeleton of the corpus.
+
+    :param update: Write the detected outputs as the new expected outputs instead of failing on differences.
+    :type update: bool
+
+    :param budget_scale: Multiplier for every time budget, raise it on slow machines.
+    :type budget_scale: float
+
+    :param corpus_folder: Folder holding the corpus json files.
+    :type corpus_folder: str
+
+    :return: Number of skeletons that failed.
+    :rtype: int
+    """
+    failed = 0
+    for corpus_path, corpus_entry in load_corpus(corpus_folder):
+        detected = detect_chains_and_goals(corpus_entry['bones'])
+        duration_ms = time_detection(corpus_entry['bones'])
+        time_budget_ms = corpus_entry.get('time_budget_ms', DEFAULT_TIME_BUDGET_MS) * budget_scale
+
+        differences = get_differences(corpus_entry['expected'], detected)
+        if update and differences:
+            corpus_entry['expected'] = detected
+            write_corpus_entry(corpus_path, corpus_entry)
+            print('{}: updated {} expected outputs'.format(corpus_entry['name'], len(differences)))
+            differences = []
+        over_budget = duration_ms > time_budget_ms
+
+        status = 'failed' if differences or over_budget else 'ok'
+        print('{}: {} ({:.2f} ms of {:.2f} ms)'.format(corpus_entry['name'], status, duration_ms, time_budget_ms))
+        for difference in differences:
+            print('    ' + difference)
+        if over_budget:
+            print('    over the time budget')
+        if status == 'failed':
+            failed += 1
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--update', action='store_true', help='Accept the detected outputs as the new expected outputs.')
+    parser.add_argument('--budget-scale', type=float, default=1.0, help='Multiplier for every time budget.')
+    parser.add_argument('--add', nargs=2, metavar=('NAME', 'BONES_TXT'), help='Add a skeleton from a bone list file.')
+    parser.add_argument('--source', default='', help='Where the bone names of an added skeleton come from.')
+    parser.add_argument('--time-budget-ms', type=float, default=DEFAULT_TIME_BUDGET_MS)
+    parser.add_argument('--corpus-folder', default=CORPUS_FOLDER)
+    args = parser.parse_args()
+
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    install_fake_unreal()
+    if args.add:
+        print(add_skeleton(args.add[0], args.add[1], args.time_budget_ms, source=args.source, corpus_folder=args.corpus_folder))
+    else:
+        sys.exit(1 if main(update=args.update, budget_scale=args.budget_scale, corpus_folder=args.corpus_folder) else 0)
@@ -0,0 +1,145 @@
+"""Check the pose math of the retarget quality check against small hand made fixtures.
+
+Runs offline with a stand in ``unreal`` module, so it works from any Python 3 with numpy outside the editor::
+
+    python check_retarget_quality.py
+
+Every ``retarget_quality_corpus/*.json`` file holds the inputs of one call to a pure numpy function of
+``retarget_quality_check`` with the output it is expected to return. The expected outputs were worked out by hand, so
+a difference points at the math and not at the fixture. Fixtures are only ever edited by hand, after working out the
+new expected output again.
+
+The exit code is 1 when any fixture differs from its expected output.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+
+CORPUS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'retarget_quality_corpus')
+# Positions are in centimeters and angles in degrees, anything closer than this is the same value
+TOLERANCE = 1e-4
+
+
+def run_fixture(fixture):
+    """Call the function a fixture describes with its inputs.
+
+    :param fixture: Name, function name and inputs of the fixture, lists stand in for arrays.
+    :type fixture: dict
+
+    :return: Output of the function made json serializable, arrays become nested lists.
+    :rtype: object
+    """
+    import numpy as np
+    import retarget_quality_check as ddrqc
+
+    inputs = fixture['inputs']
+    if fixture['function'] == 'compose_component_space':
+        output = ddrqc.compose_component_space(
+            np.array(inputs['translations'], dtype=float),
+            np.array(inputs['rotations'], dtype=float),
+            np.array(inputs['scales'], dtype=float),
+            inputs['parent_indices']
+        )
+    elif fixture['function'] == 'get_foot_sliding':
+        output = ddrqc.get_foot_sliding(
+            np.array(inputs['source_foot_positions'], dtype=float),
+            np.array(inputs['target_foot_positions'], dtype=float),
+            inputs['source_leg_length'],
+            inputs['target_leg_length']
+        )
+    elif fixture['function'] == 'get_bend_angles':
+        output = ddrqc.get_bend_angles(np.array(inputs['chain_positions'], dtype=float))
+    elif fixture['function'] == 'get_reference_alignment':
+        output = ddrqc.get_reference_alignment(
+            np.array(inputs['source_reference_points'], dtype=float),
+            np.array(inputs['target_reference_points'], dtype=float)
+        )
+    elif fixture['function'] == 'get_trajectory_errors':
+        output = ddrqc.get_trajectory_errors(
+            np.array(inputs['source_chain_positions'], dtype=float),
+            np.array(inputs['target_chain_positions'], dtype=float),
+            None if inputs['alignment'] is None else np.array(inputs['alignment'], dtype=float)
+        )
+    elif fixture['function'] == 'get_joint_limit_violations':
+        output = ddrqc.get_joint_limit_violations(
+            np.array(inputs['source_chain_positions'], dtype=float),
+            np.array(inputs['target_chain_positions'], dtype=float),
+            inputs['tolerance']
+        )
+    else:
+        raise ValueError('Fixture "{}" names unknown function "{}"'.format(fixture['name'], fixture['function']))
+    return output.tolist() if isinstance(output, np.ndarray) else output
+
+
+def is_close(expected, output):
+    """Compare an expected output with the output of a fixture, numbers only need to be within :data:`TOLERANCE`.
+
+    :param expected: Expected output of the fixture.
+    :type expected: object
+
+    :param output: Output returned by :func:`run_fixture`.
+    :type output: object
+
+    :return: True when both have the same shape and every number matches.
+    :rtype: bool
+    """
+    if isinstance(expected, list) or isinstance(output, list):
+        return (
+            isinstance(expected, list) and isinstance(output, list) and len(expected) == len(output)
+            and all(is_close(expected_item, output_item) for expected_item, output_item in zip(expected, output))
+        )
+    if expected is None or output is None:
+        return expected is None and output is None
+    return abs(expected - output) <= TOLERANCE
+
+
+def load_corpus(corpus_folder=CORPUS_FOLDER):
+    """Read every fixture of the corpus.
+
+    :param corpus_folder: Folder holding the fixture json files.
+    :type corpus_folder: str
+
+    :return: Filepath to fixture, sorted by filepath.
+    :rtype: list of tuple
+    """
+    corpus = []
+    for filename in sorted(os.listdir(corpus_folder)):
+        if filename.endswith('.json'):
+            fixture_path = os.path.join(corpus_folder, filename)
+            with open(fixture_path, 'r') as fixture_file:
+                corpus.append((fixture_path, json.load(fixture_file)))
+    return corpus
+
+
+def main(corpus_folder=CORPUS_FOLDER):
+    """Check every fixture of the corpus.
+
+    :param corpus_folder: Folder holding the fixture json files.
+    :type corpus_folder: str
+
+    :return: Number of fixtures that failed.
+    :rtype: int
+    """
+    failed = 0
+    for _, fixture in load_corpus(corpus_folder):
+        output = run_fixture(fixture)
+        matches = is_close(fixture['expected'], output)
+        print('{}: {}'.format(fixture['name'], 'ok' if matches else 'failed'))
+        if not matches:
+            print('    expected {}, got {}'.format(json.dumps(fixture['expected']), json.dumps(output)))
+            failed += 1
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--corpus-folder', default=CORPUS_FOLDER)
+    args = parser.parse_args()
+
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    import check_chain_detection as ddccd
+    ddccd.install_fake_unreal()
+    sys.exit(1 if main(corpus_folder=args.corpus_folder) else 0)
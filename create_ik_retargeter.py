@@ -1,7 +1,11 @@
 """Create a IKRetargeter uasset from two IKRig uassets that will be used to batch retarget animation from one to another."""
 
+import collections
+
 import unreal
 
+import ik_rig_result_store as ddirs
+
 
 asset_tools = unreal.AssetToolsHelpers.get_asset_tools()
 editor_asset_subsystem = unreal.get_editor_subsystem(unreal.EditorAssetSubsystem)
@@ -20,11 +24,53 @@ def get_asset_root(skeletal_mesh):
     return skeletal_mesh.split(uasset_split_string)[0] # '/Game/Library/Packs/FluidFlux/Demo/Mannequin/Mesh'
 
 
+def get_chain_names(ik_rig, chain_specs=None):
+    """Get the retarget chain names of an IKRig, from its generated chain specs when they are available.
+
+    :param ik_rig: Loaded IKRig uasset.
+    :type ik_rig: :class:`unreal.IKRigDefinition`
+
+    :param chain_specs: Chain dicts generated by ``create_ik_rig.create_chain_dict`` for this IKRig.
+    :type chain_specs: list of dict
+
+    :return: Chain names in the order they were created.
+    :rtype: list of str
+    """
+    if chain_specs:
+        return [chain_dict["chain_name"] for chain_dict in chain_specs]
+    return [str(bone_chain.chain_name) for bone_chain in unreal.IKRigController.get_controller(ik_rig).get_retarget_chains()]
+
+
+def get_exact_chain_mapping(source_chain_names, target_chain_names):
+    """Pair every target chain with the source chain that was generated with the same canonical name.
+
+    :param source_chain_names: Retarget chain names of the source IKRig.
+    :type source_chain_names: list of str
+
+    :param target_chain_names: Retarget chain names of the target IKRig.
+    :type target_chain_names: list of str
+
+    :return: Target chain name to source chain name pairs, targets without an exact match are left out.
+    :rtype: :class:`collections.OrderedDict`
+    """
+    source_chain_names = set(source_chain_names)
+    chain_mapping = collections.OrderedDict()
+    for target_chain_name in target_chain_names:
+        if target_chain_name in source_chain_names:
+            chain_mapping[target_chain_name] = target_chain_name
+    return chain_mapping
+
+
 class CreateIKRetargeter(object):
     """Class used to create the IKRetargeter uasset."""
 
     def createIkRetargeter(self):
-        """Generate a IKRig uasset."""
+        """Generate a IKRetargeter uasset, or load the one a previous run generated so a rerun maps it again in place."""
+        ik_retargeter_path = self.target_skeletal_mesh_root_folder + '/GeneratedIKRetargeter'
+        if editor_asset_subsystem.does_asset_exist(ik_retargeter_path):
+            unreal.log_warning('IKRetargeter "{}" Already existed, updating it...'.format(ik_retargeter_path))
+            self.generated_ik_retargeter = editor_asset_subsystem.load_asset(asset_path=ik_retargeter_path)
+            return
         # Creates the retargeter in the target uasset folder
         self.generated_ik_retargeter = asset_tools.create_asset(
             asset_name='GeneratedIKRetargeter',
@@ -37,20 +83,92 @@ class CreateIKRetargeter(object):
         # Get the IK Retargeter controller.
         self.retargeter_controller = unreal.IKRetargeterController.get_controller(self.generated_ik_retargeter)
 
-    def setRetargeterSourceAndTarget(self):
+    def setRetargeterSourceAndTarget(self, chain_mapping=None, chain_mapping_mode='fuzzy'):
+        """Assign the source and target IKRigs and map their chains.
+
+        :param chain_mapping: Target chain name to source chain name pairs to apply instead of auto mapping.
+        :type chain_mapping: dict
+
+        :param chain_mapping_mode: ``fuzzy`` to auto map every chain, ``exact`` to pair chains by their generated
+            names and only fuzzy map the chains that could not be paired.
+        :type chain_mapping_mode: str
+        """
         # Load the Source and Target IK Rigs.
         # ['/Game/Library/Packs/FluidFlux/Demo/Mannequin/Mesh/SK_Mannequin.SK_Mannequin', '/Game/Assets/Character/CHA_Pv4Test/CHA_Pv4Test_Main__Standard/Modeling/Meshes/v000/SK_CHA_Pv4Test_Main__Standard_Modeling.SK_CHA_Pv4Test_Main__Standard_Modeling']
-        source_ik_rig = editor_asset_subsystem.load_asset(asset_path=self.source_skeletal_mesh_root_folder + '/GeneratedIKRig')
-        target_ik_rig = editor_asset_subsystem.load_asset(asset_path=self.target_skeletal_mesh_root_folder + '/GeneratedIKRig')
+        self.source_ik_rig = editor_asset_subsystem.load_asset(asset_path=self.source_skeletal_mesh_root_folder + '/GeneratedIKRig')
+        self.target_ik_rig = editor_asset_subsystem.load_asset(asset_path=self.target_skeletal_mesh_root_folder + '/GeneratedIKRig')
 
         # Assign the Source and Target IK Rigs.
-        self.retargeter_controller.set_ik_rig(unreal.RetargetSourceOrTarget.SOURCE, source_ik_rig)
-        self.retargeter_controller.set_ik_rig(unreal.RetargetSourceOrTarget.TARGET, target_ik_rig)
-
-        # Map the chains of the source IKRig to the Target IKRig
-        self.retargeter_controller.auto_map_chains(unreal.AutoMapChainType.FUZZY, True)
-
-    def main(self, source_skeletal_mesh, target_skeletal_mesh):
+        self.retargeter_controller.set_ik_rig(unreal.RetargetSourceOrTarget.SOURCE, self.source_ik_rig)
+        self.retargeter_controller.set_ik_rig(unreal.RetargetSourceOrTarget.TARGET, self.target_ik_rig)
+
+        self.chain_mapping_methods = {}
+        if chain_mapping:
+            # Apply a mapping that was already worked out on another machine
+            for target_chain_name, source_chain_name in chain_mapping.items():
+                self.retargeter_controller.set_source_chain(source_chain_name, target_chain_name)
+                self.chain_mapping_methods[target_chain_name] = 'stored'
+        elif chain_mapping_mode == 'exact':
+            self.mapChainsExactly()
+        else:
+            # Map the chains of the source IKRig to the Target IKRig
+            self.retargeter_controller.auto_map_chains(unreal.AutoMapChainType.FUZZY, True)
+
+    def mapChainsExactly(self):
+        """Map chains that share a generated name directly and only fall back to fuzzy matching for the rest."""
+        target_chain_names = get_chain_names(self.target_ik_rig, self.target_chain_specs)
+        exact_chain_mapping = get_exact_chain_mapping(
+            get_chain_names(self.source_ik_rig, self.source_chain_specs),
+            target_chain_names
+        )
+        for target_chain_name, source_chain_name in exact_chain_mapping.items():
+            self.retargeter_controller.set_source_chain(source_chain_name, target_chain_name)
+            self.chain_mapping_methods[target_chain_name] = 'exact'
+
+        # Without forcing a remap the fuzzy pass leaves the exact pairs alone and only fills in the chains left over
+        if len(exact_chain_mapping) < len(target_chain_names):
+            self.retargeter_controller.auto_map_chains(unreal.AutoMapChainType.FUZZY, False)
+            for target_chain_name in target_chain_names:
+                if target_chain_name not in exact_chain_mapping:
+                    self.chain_mapping_methods[target_chain_name] = 'fuzzy'
+
+    def getChainMappingReport(self):
+        """Report which source chain every target chain was mapped to and how it was mapped.
+
+        :return: Target chain name to a dict holding the ``source_chain`` and the ``method`` used to map it.
+        :rtype: dict
+        """
+        chain_mapping_report = {}
+        for target_chain_name, source_chain_name in self.getChainMapping().items():
+            method = self.chain_mapping_methods.get(target_chain_name, 'fuzzy')
+            if not source_chain_name or source_chain_name == 'None':
+                method = 'unmapped'
+            chain_mapping_report[target_chain_name] = {"source_chain": source_chain_name, "method": method}
+            unreal.log('Chain "{}" <- "{}" ({})'.format(target_chain_name, source_chain_name, method))
+        return chain_mapping_report
+
+    def getChainMapping(self):
+        """Read back which source chain every target chain ended up mapped to.
+
+        :return: Target chain name to source chain name pairs.
+        :rtype: dict
+        """
+        target_ik_rig_controller = unreal.IKRigController.get_controller(self.target_ik_rig)
+        chain_mapping = {}
+        for bone_chain in target_ik_rig_controller.get_retarget_chains():
+            target_chain_name = str(bone_chain.chain_name)
+            chain_mapping[target_chain_name] = str(self.retargeter_controller.get_source_chain(target_chain_name))
+        return chain_mapping
+
+    def main(
+        self, 
+        source_skeletal_mesh, 
+        target_skeletal_mesh, 
+        result_store=None, 
+        chain_mapping_mode='fuzzy', 
+        source_chain_specs=None, 
+        target_chain_specs=None
+    ):
         """Generate a IKRetargeter using two IKRig uassets.
         
         :param source_skeletal_mesh: Full unreal filepath to the source skeletal mesh uasset.
@@ -59,6 +177,18 @@ class CreateIKRetargeter(object):
         :param target_skeletal_mesh: Full unreal filepath to the target skeletal mesh uasset.
         :type target_skeletal_mesh: str
 
+        :param result_store: Shared store to pull a known chain mapping from and publish new chain mappings to.
+        :type result_store: :class:`ik_rig_result_store.IKRigResultStore`
+
+        :param chain_mapping_mode: ``fuzzy`` to auto map every chain, ``exact`` to pair chains by their generated names.
+        :type chain_mapping_mode: str
+
+        :param source_chain_specs: Chain dicts generated for the source IKRig, read from the IKRig when not given.
+        :type source_chain_specs: list of dict
+
+        :param target_chain_specs: Chain dicts generated for the target IKRig, read from the IKRig when not given.
+        :type target_chain_specs: list of dict
+
         :return: IK Retargeter uasset.
         :rtype: :class:`unreal.IKRetargeter`
         """
@@ -66,8 +196,28 @@ class CreateIKRetargeter(object):
         # target_skeletal_mesh = '/Game/Assets/Character/CHA_Pv4Test/CHA_Pv4Test_Main__Standard/Modeling/Meshes/v000/SK_CHA_Pv4Test_Main__Standard_Modeling.SK_CHA_Pv4Test_Main__Standard_Modeling'
         self.source_skeletal_mesh_root_folder = get_asset_root(source_skeletal_mesh)
         self.target_skeletal_mesh_root_folder = get_asset_root(target_skeletal_mesh)
+        self.source_chain_specs = source_chain_specs
+        self.target_chain_specs = target_chain_specs
+
+        # Retargeter results are keyed on the target skeleton and on the source skeleton the source rig was built from
+        retargeter_spec = None
+        target_skeleton_hash = None
+        source_skeleton_hash = None
+        if result_store:
+            target_skeleton_hash = ddirs.get_skeleton_hash(unreal.load_object(name=target_skeletal_mesh, outer=None))
+            source_skeleton_hash = ddirs.get_skeleton_hash(unreal.load_object(name=source_skeletal_mesh, outer=None))
+            # Fuzzy and exact mapping can pair chains differently so each mode keeps its own results
+            source_rig = '{}:{}'.format(source_skeleton_hash, chain_mapping_mode)
+            if target_skeleton_hash and source_skeleton_hash:
+                retargeter_spec = result_store.pull(target_skeleton_hash, source_rig=source_rig)
 
         self.createIkRetargeter()
         self.getRetargeterController()
-        self.setRetargeterSourceAndTarget()
+        if retargeter_spec:
+            self.setRetargeterSourceAndTarget(chain_mapping=retargeter_spec["chain_mapping"])
+        else:
+            self.setRetargeterSourceAndTarget(chain_mapping_mode=chain_mapping_mode)
+            if target_skeleton_hash and source_skeleton_hash:
+                result_store.publish(target_skeleton_hash, {"chain_mapping": self.getChainMapping()}, source_rig=source_rig)
+        self.chain_mapping_report = self.getChainMappingReport()
         return self.generated_ik_retargeter
@@ -4,10 +4,18 @@ import re
 
 import unreal
 
+import ik_rig_result_store as ddirs
+
 
 asset_tools = unreal.AssetToolsHelpers.get_asset_tools()
 ik_rig_controller_tools = unreal.IKRigController()
 
+# Chains and goals are created in this order, check_chain_detection walks the same lists
+RIG_SIDES = ['left', 'right']
+MULTI_SIDE_CHAIN_CHOICES = ['arm', 'leg', 'index', 'middle', 'ring', 'pinky', 'thumb']
+CENTER_CHAIN_CHOICES = ['spine', 'neck', 'head']
+END_GOAL_CHAIN_CHOICES = [('Hand', 'Arm'), ('Foot', 'Leg')]
+
 
 def get_asset_root(skeletal_mesh):
     """Manipulate skeletal mesh path string to return the folder path.
@@ -449,6 +457,30 @@ def create_ik_goal(
     return ik_goal_name
 
 
+def get_missing_spec_bones(rig_spec, bone_names):
+    """Find the bones a stored IKRig spec uses that the target skeleton does not have.
+
+    :param rig_spec: IKRig spec returned by :meth:`CreateIKRig.getRigSpec`.
+    :type rig_spec: dict
+
+    :param bone_names: Bone names of the target skeleton.
+    :type bone_names: list of str
+
+    :return: Missing bone names, empty when the spec can be applied.
+    :rtype: list of str
+    """
+    spec_bone_names = [rig_spec["retarget_root"]]
+    for chain_dict in rig_spec["chains"]:
+        spec_bone_names.extend([chain_dict["start_bone_name"], chain_dict["end_bone_name"]])
+    spec_bone_names.extend(goal_spec["bone_name"] for goal_spec in rig_spec["goals"])
+    bone_names = set(bone_names)
+    missing_bone_names = []
+    for bone_name in spec_bone_names:
+        if bone_name not in bone_names and bone_name not in missing_bone_names:
+            missing_bone_names.append(bone_name)
+    return missing_bone_names
+
+
 class CreateIKRig(object):
     """Class used to create the IKRig uassets from a SkeletalMesh uasset."""
 
@@ -480,28 +512,23 @@ class CreateIKRig(object):
 
     def createChain(self):
         """Create all of the bone chains required to retarget animation between two IKRigs."""
-        rig_sides = ['left', 'right']
-        multi_side_chain_choices = ['arm', 'leg', 'index', 'middle', 'ring', 'pinky', 'thumb']
-        chain_choices = ['spine', 'neck', 'head']
-        for chain_choice in multi_side_chain_choices:
-            for rig_side in rig_sides:
+        self.chain_specs = []
+        for chain_choice in MULTI_SIDE_CHAIN_CHOICES:
+            for rig_side in RIG_SIDES:
                 chain_dict = create_chain_dict(rig_side=rig_side, chain_choice=chain_choice, unique_bone_names=self.unique_bone_names)
                 self.ik_rig_controller.add_retarget_chain(chain_name=chain_dict["chain_name"], start_bone_name=chain_dict["start_bone_name"], end_bone_name=chain_dict["end_bone_name"], goal_name='')
-        for chain_choice in chain_choices:
+                self.chain_specs.append(chain_dict)
+        for chain_choice in CENTER_CHAIN_CHOICES:
             chain_dict = create_chain_dict(rig_side=rig_side, chain_choice=chain_choice, unique_bone_names=self.unique_bone_names)
             self.ik_rig_controller.add_retarget_chain(chain_name=chain_dict["chain_name"], start_bone_name=chain_dict["start_bone_name"], end_bone_name=chain_dict["end_bone_name"], goal_name='')
+            self.chain_specs.append(chain_dict)
 
     def createGoals(self):
         """Create all the goals that are needed for an accurate IK system."""
         self.ik_goals = []
-        rig_sides = ['left', 'right']
-        end_goals = ['Hand', 'Foot']
-        for rig_side in rig_sides:
-            for end_goal in end_goals:
-                if end_goal == 'Hand':
-                    chain_choice = 'Arm'
-                elif end_goal == 'Foot':
-                    chain_choice = 'Leg'
+        self.goal_specs = []
+        for rig_side in RIG_SIDES:
+            for end_goal, chain_choice in END_GOAL_CHAIN_CHOICES:
                 ik_goal_name = create_ik_goal(
                     rig_side=rig_side, 
                     end_goal=end_goal,
@@ -511,6 +538,41 @@ class CreateIKRig(object):
                 )
                 if ik_goal_name not in self.ik_goals:
                     self.ik_goals.append(ik_goal_name)
+                    self.goal_specs.append({
+                        "goal_name": ik_goal_name,
+                        "bone_name": str(self.ik_rig_controller.get_goal_bone(ik_goal_name)),
+                        "chain_name": "{side_long}{chain_choice}".format(side_long=get_rig_side_values(rig_side)[1], chain_choice=chain_choice)
+                    })
+
+    def getRigSpec(self):
+        """Serialize the chains, goals and root that were generated so they can be published to the result store.
+
+        :return: IKRig spec.
+        :rtype: dict
+        """
+        return {
+            "retarget_root": self.root_bone,
+            "chains": self.chain_specs,
+            "goals": self.goal_specs
+        }
+
+    def applyRigSpec(self, rig_spec):
+        """Recreate the chains, goals and root from a stored spec instead of querying the skeleton hierarchy.
+
+        :param rig_spec: IKRig spec returned by :meth:`getRigSpec`.
+        :type rig_spec: dict
+        """
+        self.root_bone = rig_spec["retarget_root"]
+        self.setRetargetRoot()
+        self.chain_specs = rig_spec["chains"]
+        for chain_dict in self.chain_specs:
+            self.ik_rig_controller.add_retarget_chain(chain_name=chain_dict["chain_name"], start_bone_name=chain_dict["start_bone_name"], end_bone_name=chain_dict["end_bone_name"], goal_name='')
+        self.goal_specs = rig_spec["goals"]
+        self.ik_goals = []
+        for goal_spec in self.goal_specs:
+            self.ik_rig_controller.add_new_goal(goal_name=goal_spec["goal_name"], bone_name=goal_spec["bone_name"])
+            self.ik_rig_controller.set_retarget_chain_goal(goal_spec["chain_name"], goal_spec["goal_name"])
+            self.ik_goals.append(goal_spec["goal_name"])
 
     def createSolver(self):
         """Create the IK Solver that will house all the IK Goals that drive IK animation."""
@@ -528,7 +590,7 @@ class CreateIKRig(object):
             factory=unreal.IKRigDefinitionFactory()
         )
     
-    def main(self, skeletal_mesh, skeletal_mesh_root_folder):
+    def main(self, skeletal_mesh, skeletal_mesh_root_folder, show_progress_dialog=True, result_store=None):
         """Generate a IKRig using the currently selected SkeletalMesh.
         
         :param skeletal_mesh: Name of the asset that is selected in the content browser.
@@ -537,10 +599,19 @@ class CreateIKRig(object):
         :param skeletal_mesh_root_folder: Root folder that the selected asset exists in.
         :type skeletal_mesh_root_folder: str
 
+        :param show_progress_dialog: Show the slow task dialog, disable it when running without the editor UI.
+        :type show_progress_dialog: bool
+
+        :param result_store: Shared store to pull a known spec from and publish newly generated specs to.
+        :type result_store: :class:`ik_rig_result_store.IKRigResultStore`
+
         :return: Generated IKRig.
         :rtype: :class:`unreal.IKRigDefinition`
         """
         self.unloaded_skeletal_mesh = skeletal_mesh
+        # Cleared so a reused instance never reports the chains of the previous IKRig when this one already exists
+        self.chain_specs = None
+        self.goal_specs = None
         self.loaded_skeletal_mesh = unreal.load_object(name=self.unloaded_skeletal_mesh, outer=None)
         self.skeletal_mesh_root_folder = skeletal_mesh_root_folder
         self.ik_rig_blueprint_name = 'GeneratedIKRig'
@@ -556,28 +627,52 @@ class CreateIKRig(object):
             self.getIkRigController()
             self.setSkeletalMesh()
 
-            total_assets_to_load = 1
-            text_label = "Creating Control Rig Now..."
-            with unreal.ScopedSlowTask(total_assets_to_load, text_label) as slow_task:
-                slow_task.make_dialog(True)
-                for i in range(total_assets_to_load):
-                    if slow_task.should_cancel():
-                        break
-                    slow_task.enter_progress_frame(1)
-                # self.getSkeletalMesh()
-                self.createTemporaryControlRig()
+            # Pull a spec another machine already generated for this skeleton
+            rig_spec = None
+            skeleton_hash = None
+            if result_store:
+                bone_names, parent_indices = ddirs.get_bone_hierarchy(self.loaded_skeletal_mesh)
+                skeleton_hash = ddirs.hash_bone_hierarchy(bone_names, parent_indices)
+                if skeleton_hash:
+                    rig_spec = result_store.pull(skeleton_hash)
+                if rig_spec:
+                    # A damaged or hand edited result must not build chains on bones the mesh does not have
+                    missing_bone_names = get_missing_spec_bones(rig_spec, bone_names)
+                    if missing_bone_names:
+                        unreal.log_warning('Stored spec for "{}" uses missing bones {}, running chain detection...'.format(ik_rig_expected_package_name, missing_bone_names))
+                        rig_spec = None
+
+            if rig_spec:
+                unreal.log('IKRig "{}" found in the result store, skipping chain detection...'.format(ik_rig_expected_package_name))
+                self.applyRigSpec(rig_spec)
+                self.createSolver()
+            else:
+                total_assets_to_load = 1
+                text_label = "Creating Control Rig Now..."
+                with unreal.ScopedSlowTask(total_assets_to_load, text_label) as slow_task:
+                    if show_progress_dialog:
+                        slow_task.make_dialog(True)
+                    for i in range(total_assets_to_load):
+                        if slow_task.should_cancel():
+                            break
+                        slow_task.enter_progress_frame(1)
+                    # self.getSkeletalMesh()
+                    self.createTemporaryControlRig()
+
+                #IKRig Setup Steps
+                self.getAllBones()
+                self.setRetargetRoot()
+                self.createChain()
 
-            #IKRig Setup Steps
-            self.getAllBones()
-            self.setRetargetRoot()
-            self.createChain()
+                # Create the solver and goals needed
+                self.createGoals()
+                self.createSolver()
 
-            # Create the solver and goals needed
-            self.createGoals()
-            self.createSolver()
+                # Delete the ControlRig that was created since it was only needed to get all the bone names
+                unreal.EditorAssetLibrary.delete_asset(self.temp_control_rig_reference.get_path_name()) # Do this last so that it does not get corrupted and not delete
 
-            # Delete the ControlRig that was created since it was only needed to get all the bone names
-            unreal.EditorAssetLibrary.delete_asset(self.temp_control_rig_reference.get_path_name()) # Do this last so that it does not get corrupted and not delete
+                if skeleton_hash:
+                    result_store.publish(skeleton_hash, self.getRigSpec())
 
             return self.generated_ik_rig
         # Load pre-existing IKRig uasset and return it so it can be used for retargeting
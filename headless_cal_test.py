@@ -0,0 +1,554 @@
+"""Run the IKRig creation and animation transfer for a manifest of skeletal meshes without the editor UI.
+
+Launch it through the python commandlet so no editor window, dialog or detached process is created, the manifest and
+result paths are passed through the environment since the commandlet does not forward quoted script arguments::
+
+    CAL_TEST_MANIFEST=jobs.json CAL_TEST_RESULT=result.json UnrealEditor-Cmd Project.uproject -run=pythonscript -script=headless_cal_test.py
+
+The manifest is a json file shaped like::
+
+    {
+        "source_skeletal_mesh": "/Game/Library/Packs/FluidFlux/Demo/Mannequin/Mesh/SK_Mannequin.SK_Mannequin",
+        "source_animation_folder": "/Game/Library/Packs/FluidFlux/Demo/Mannequin/Animations",
+        "result_store": "/mnt/share/ik_rig_results",
+        "jobs": [
+            {
+                "skeletal_mesh_name": "SK_CHA_Pv4Test_Main__Standard_Modeling",
+                "skeletal_mesh_root_folder": "/Game/Assets/Character/CHA_Pv4Test/CHA_Pv4Test_Main__Standard/Modeling/Meshes/v000",
+                "level_sequence": "/Game/Assets/Character/CHA_Pv4Test/Turntable/LS_CalTest",
+                "assemble_all_clips": true
+            }
+        ]
+    }
+
+``source_animation_folder``, ``result_store``, ``group_by_skeleton``, ``fan_out``, ``fan_out_chunk_size``,
+``unload_between_jobs``, ``memory_ceiling_mb``, ``quality_check``, ``quality_thresholds`` and ``assemble_all_clips``
+are optional, jobs may also set ``chain_mapping_mode`` to ``fuzzy`` to skip the exact chain pairing.
+
+Unlike ``setup_cal_test`` the headless run does not copy the Calisthenics turntable level and sequence for the asset,
+that copy opens the level and needs the editor UI. Every job has to name a ``level_sequence`` that already exists and
+already contains a binding named after the skeletal mesh, the sequence is loaded by path so nothing depends on an
+active Sequencer editor. A job without one fails instead of reporting a turntable that was never set up.
+"""
+
+import argparse
+import collections
+import json
+import os
+import sys
+import traceback
+
+import unreal
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asset_registry_access as ddara
+import batch_memory as ddbm
+import create_ik_rig as ddcir
+import create_ik_retargeter as ddcirt
+import ik_rig_result_store as ddirs
+import retarget_quality_check as ddrqc
+import retargeter_animation_transfer as ddrat
+import sequencer_animation_tracks as ddsat
+
+
+editor_asset_subsystem = unreal.get_editor_subsystem(unreal.EditorAssetSubsystem)
+
+DEFAULT_SOURCE_SKELETAL_MESH = '/Game/Library/Packs/FluidFlux/Demo/Mannequin/Mesh/SK_Mannequin.SK_Mannequin'
+MISSING_LEVEL_SEQUENCE_ERROR = 'Job does not name a "level_sequence", headless runs can not copy the turntable'
+
+
+def load_manifest(manifest_path):
+    """Read the job manifest from disk.
+
+    :param manifest_path: Filepath to the json manifest.
+    :type manifest_path: str
+
+    :return: Manifest contents.
+    :rtype: dict
+    """
+    with open(manifest_path, 'r') as manifest_file:
+        manifest = json.load(manifest_file)
+    if not manifest.get('jobs'):
+        raise ValueError('Manifest "{}" does not contain any jobs'.format(manifest_path))
+    return manifest
+
+
+def write_result(result_path, result):
+    """Write the run result so the farm can pick it up once the commandlet exits.
+
+    :param result_path: Filepath to write the json result to.
+    :type result_path: str
+
+    :param result: Run result.
+    :type result: dict
+    """
+    result_folder = os.path.dirname(os.path.abspath(result_path))
+    if not os.path.isdir(result_folder):
+        os.makedirs(result_folder)
+    # Write to a temporary file first so a reader never sees a half written result
+    temporary_result_path = result_path + '.tmp'
+    with open(temporary_result_path, 'w') as result_file:
+        json.dump(result, result_file, indent=4)
+    os.replace(temporary_result_path, result_path)
+
+
+def save_assets(asset_paths):
+    """Save assets to disk without going through source control dialogs.
+
+    :param asset_paths: Unreal paths of the assets to save.
+    :type asset_paths: list of str
+    """
+    for asset_path in asset_paths:
+        if not editor_asset_subsystem.save_asset(asset_to_save=asset_path, only_if_is_dirty=False):
+            raise RuntimeError('Failed to save "{}"'.format(asset_path))
+
+
+def get_target_skeletal_mesh(job):
+    """Build the full unreal filepath of a job's skeletal mesh.
+
+    :param job: Manifest entry describing the target skeletal mesh.
+    :type job: dict
+
+    :return: Full unreal filepath to the target skeletal mesh uasset.
+    :rtype: str
+    """
+    return '{skeletal_mesh_root_folder}/{skeletal_mesh_name}.{skeletal_mesh_name}'.format(skeletal_mesh_root_folder=job['skeletal_mesh_root_folder'], skeletal_mesh_name=job['skeletal_mesh_name'])
+
+
+def get_skeleton_path(target_skeletal_mesh):
+    """Find the Skeleton a skeletal mesh uses from its asset registry tags, without loading the mesh.
+
+    :param target_skeletal_mesh: Full unreal filepath to the skeletal mesh uasset.
+    :type target_skeletal_mesh: str
+
+    :return: Path of the Skeleton uasset.
+    :rtype: str
+    """
+    ddara.asset_registry_access.ensurePathsReady([ddcir.get_asset_root(target_skeletal_mesh)])
+    asset_data = ddara.asset_registry_access.asset_registry.get_asset_by_object_path(target_skeletal_mesh)
+    if not asset_data or not asset_data.is_valid():
+        raise ValueError('SkeletalMesh "{}" does not exist'.format(target_skeletal_mesh))
+    skeleton_path = str(asset_data.get_tag_value('Skeleton') or '')
+    if not skeleton_path:
+        # Meshes saved before the tag was written only tell their Skeleton once loaded
+        loaded_skeletal_mesh = unreal.load_object(name=target_skeletal_mesh, outer=None)
+        skeleton = loaded_skeletal_mesh.get_editor_property('skeleton') if loaded_skeletal_mesh else None
+        if not skeleton:
+            raise ValueError('SkeletalMesh "{}" could not be loaded or has no Skeleton'.format(target_skeletal_mesh))
+        return skeleton.get_path_name()
+    # The tag holds export text, "/Script/Engine.Skeleton'/Game/Mannequin/SK_Skeleton.SK_Skeleton'"
+    if "'" in skeleton_path:
+        skeleton_path = skeleton_path.split("'")[1]
+    return skeleton_path
+
+
+def group_jobs_by_skeleton(jobs):
+    """Group jobs whose skeletal meshes share a Skeleton so they can share one retarget.
+
+    LODs, outfit variants and body types usually share a Skeleton, and the retargeted animations only depend on
+    the Skeleton, so only the first mesh of every group needs its own IKRig, IKRetargeter and animations.
+
+    :param jobs: Manifest entries describing the target skeletal meshes.
+    :type jobs: list of dict
+
+    :return: Skeleton path to the indices of the jobs that use it in manifest order, and the index of every job
+        whose Skeleton could not be found to its error and traceback.
+    :rtype: tuple
+    """
+    job_indices_by_skeleton = collections.OrderedDict()
+    errors_by_job_index = collections.OrderedDict()
+    for job_index, job in enumerate(jobs):
+        # A bad entry or a missing mesh only fails its own job, the rest of the manifest still runs
+        try:
+            skeleton_path = get_skeleton_path(get_target_skeletal_mesh(job))
+        except Exception as error:
+            errors_by_job_index[job_index] = (error, traceback.format_exc())
+            continue
+        job_indices_by_skeleton.setdefault(skeleton_path, []).append(job_index)
+    return job_indices_by_skeleton, errors_by_job_index
+
+
+def create_retargeter_assets(source_skeletal_mesh, job, result_store=None):
+    """Create the IKRigs and IKRetargeter for a job's skeletal mesh.
+
+    :param source_skeletal_mesh: Full unreal filepath to the source skeletal mesh uasset.
+    :type source_skeletal_mesh: str
+
+    :param job: Manifest entry describing the target skeletal mesh.
+    :type job: dict
+
+    :param result_store: Shared store to pull and publish generated IKRig and IKRetargeter specs.
+    :type result_store: :class:`ik_rig_result_store.IKRigResultStore`
+
+    :return: Paths of the generated assets with the chain mapping report.
+    :rtype: dict
+    """
+    target_skeletal_mesh = get_target_skeletal_mesh(job)
+    retarget_assets = {}
+
+    createIKRig = ddcir.CreateIKRig()
+    generated_source_ik_rig = createIKRig.main(source_skeletal_mesh, ddcir.get_asset_root(source_skeletal_mesh), show_progress_dialog=False, result_store=result_store)
+    source_chain_specs = createIKRig.chain_specs
+    generated_target_ik_rig = createIKRig.main(target_skeletal_mesh, ddcir.get_asset_root(target_skeletal_mesh), show_progress_dialog=False, result_store=result_store)
+    target_chain_specs = createIKRig.chain_specs
+    retarget_assets['ik_rigs'] = [generated_source_ik_rig.get_path_name(), generated_target_ik_rig.get_path_name()]
+    save_assets(retarget_assets['ik_rigs'])
+
+    createIKRetargeter = ddcirt.CreateIKRetargeter()
+    generated_ik_retargeter = createIKRetargeter.main(
+        source_skeletal_mesh,
+        target_skeletal_mesh,
+        result_store=result_store,
+        chain_mapping_mode=job.get('chain_mapping_mode', 'exact'),
+        source_chain_specs=source_chain_specs,
+        target_chain_specs=target_chain_specs
+    )
+    retarget_assets['ik_retargeter'] = generated_ik_retargeter.get_path_name()
+    retarget_assets['chain_mapping'] = createIKRetargeter.chain_mapping_report
+    save_assets([retarget_assets['ik_retargeter']])
+    return retarget_assets
+
+
+def retarget_animations(source_animation_folder, retarget_targets, fan_out=True, chunk_size=None, memory_manager=None):
+    """Retarget the source animations to every target and save the results.
+
+    :param source_animation_folder: Folder to search for source animations.
+    :type source_animation_folder: str
+
+    :param retarget_targets: Pairs of IKRetargeter path and the folder of its target mesh.
+    :type retarget_targets: list of tuple
+
+    :param fan_out: Query and load the source animations once for every target instead of once per target.
+    :type fan_out: bool
+
+    :param chunk_size: Number of source animations sent to every target at a time when fanning out.
+    :type chunk_size: int
+
+    :param memory_manager: Releases memory between targets once the memory ceiling is hit.
+    :type memory_manager: :class:`batch_memory.BatchMemoryManager`
+
+    :return: Index of every target in ``retarget_targets`` to the paths of its retargeted AnimSequences, every
+        retargeted path to the path of its source AnimSequence, and index of every target that failed to its error.
+    :rtype: tuple
+    """
+    animations_by_target = {}
+    source_asset_paths = collections.OrderedDict()
+    errors_by_target = collections.OrderedDict()
+    # The IKRetargeters stay referenced until every target is done, they must survive a collection
+    ik_retargeter_package_names = [ik_retargeter.split('.')[0] for ik_retargeter, _ in retarget_targets]
+    # So must the IKRigs, meshes and Skeletons of the targets still to come, or every collection reloads them
+    target_package_names = [
+        ddbm.get_package_dependencies([ik_retargeter_package_name], memory_manager.package_prefixes) if memory_manager else set()
+        for ik_retargeter_package_name in ik_retargeter_package_names
+    ]
+
+    def get_keep_package_names(remaining_target_indices, extra_package_names=()):
+        keep_package_names = set(ik_retargeter_package_names) | set(extra_package_names)
+        for remaining_target_index in remaining_target_indices:
+            keep_package_names.update(target_package_names[remaining_target_index])
+        return keep_package_names
+
+    if fan_out:
+        animationRetargeter = ddrat.AnimationRetargeter()
+
+        def save_target_animations(target_index, destination_asset_paths):
+            # Save straight away, unsaved animations are dirty and could not be unloaded to make room
+            save_assets(destination_asset_paths)
+            if memory_manager:
+                memory_manager.collectIfOverCeiling(keep_package_names=get_keep_package_names(
+                    animationRetargeter.remaining_target_indices,
+                    animationRetargeter.source_package_names
+                ))
+
+        # Finding and loading the source animations is shared by every target, so a failure there fails them all
+        try:
+            loaded_retarget_targets = [
+                (editor_asset_subsystem.load_asset(asset_path=ik_retargeter), target_base_folder)
+                for ik_retargeter, target_base_folder in retarget_targets
+            ]
+            animations_by_target = dict(enumerate(animationRetargeter.fanOut(
+                loaded_retarget_targets,
+                source_animation_folder=source_animation_folder,
+                chunk_size=chunk_size,
+                on_target_done=save_target_animations
+            )))
+        except Exception as error:
+            unreal.log_error('Retargeting from "{}" failed: {}'.format(source_animation_folder, error))
+            return {}, source_asset_paths, collections.OrderedDict((target_index, str(error)) for target_index in range(len(retarget_targets)))
+        errors_by_target.update(animationRetargeter.fan_out_errors)
+        source_asset_paths.update(animationRetargeter.source_asset_paths)
+    else:
+        for target_index, (ik_retargeter, target_base_folder) in enumerate(retarget_targets):
+            animationRetargeter = ddrat.AnimationRetargeter()
+            try:
+                animationRetargeter.main(
+                    generated_ik_retargeter=editor_asset_subsystem.load_asset(asset_path=ik_retargeter),
+                    target_base_folder=target_base_folder,
+                    source_animation_folder=source_animation_folder
+                )
+                save_assets(animationRetargeter.destination_asset_paths)
+            except Exception as error:
+                errors_by_target[target_index] = str(error)
+                continue
+            animations_by_target[target_index] = animationRetargeter.destination_asset_paths
+            source_asset_paths.update(animationRetargeter.source_asset_paths)
+            if memory_manager:
+                memory_manager.collectIfOverCeiling(keep_package_names=get_keep_package_names(range(target_index + 1, len(retarget_targets))))
+    for target_index in errors_by_target:
+        animations_by_target.pop(target_index, None)
+    return animations_by_target, source_asset_paths, errors_by_target
+
+
+def check_retarget_quality(retarget_assets, animations, source_asset_paths, thresholds=None):
+    """Compare the retargeted animations of a group with their source animations.
+
+    :param retarget_assets: Paths of the IKRigs and IKRetargeter the animations were retargeted with.
+    :type retarget_assets: dict
+
+    :param animations: Paths of the retargeted AnimSequences.
+    :type animations: list of str
+
+    :param source_asset_paths: Path of every retargeted AnimSequence to the path of its source.
+    :type source_asset_paths: dict
+
+    :param thresholds: Metric name to the value above which an AnimSequence is flagged.
+    :type thresholds: dict
+
+    :return: Quality report of every retargeted AnimSequence and the ones that were flagged.
+    :rtype: dict
+    """
+    source_ik_rig, target_ik_rig = retarget_assets['ik_rigs']
+    retargetQualityCheck = ddrqc.RetargetQualityCheck(thresholds=thresholds)
+    return retargetQualityCheck.main(
+        source_ik_rig=source_ik_rig,
+        target_ik_rig=target_ik_rig,
+        ik_retargeter=retarget_assets['ik_retargeter'],
+        source_asset_paths=collections.OrderedDict((animation, source_asset_paths.get(animation)) for animation in animations)
+    )
+
+
+def bind_level_sequence(job, animations):
+    """Bind the retargeted animations to the job's skeletal mesh in the LevelSequence the job names.
+
+    :param job: Manifest entry describing the target skeletal mesh.
+    :type job: dict
+
+    :param animations: Paths of the retargeted AnimSequences.
+    :type animations: list of str
+
+    :return: LevelSequence path and clip index.
+    :rtype: dict
+    """
+    level_sequence_path = job.get('level_sequence')
+    if not level_sequence_path:
+        # The turntable copy setup_cal_test makes needs the editor UI, so headless jobs must bring their own sequence
+        raise ValueError(MISSING_LEVEL_SEQUENCE_ERROR)
+    skeletal_mesh_name = job['skeletal_mesh_name']
+    sequence_result = {'level_sequence': level_sequence_path}
+    level_sequence = editor_asset_subsystem.load_asset(asset_path=level_sequence_path)
+    if not level_sequence:
+        raise RuntimeError('LevelSequence "{}" could not be loaded'.format(level_sequence_path))
+    ddsat.muteControlRigTrack(skeletal_mesh_name=skeletal_mesh_name, level_sequence=level_sequence)
+    if job.get('assemble_all_clips'):
+        clip_index = ddsat.setAnimationTracks(
+            skeletal_mesh_name=skeletal_mesh_name,
+            level_sequence=level_sequence,
+            cal_test_animations=animations
+        )
+        sequence_result['clip_index'] = {clip_name: list(frame_range) for clip_name, frame_range in clip_index.items()}
+    else:
+        ddsat.setAnimationTrack(
+            skeletal_mesh_name=skeletal_mesh_name,
+            level_sequence=level_sequence,
+            cal_test_animation=animations[-1]
+        )
+    save_assets([level_sequence_path])
+    return sequence_result
+
+
+def get_failed_job_result(job, error, error_traceback=None):
+    """Build the result of a job that failed.
+
+    :param job: Manifest entry describing the target skeletal mesh.
+    :type job: dict
+
+    :param error: Error the job failed with.
+    :type error: str
+
+    :param error_traceback: Formatted traceback of the error.
+    :type error_traceback: str
+
+    :return: Job result.
+    :rtype: dict
+    """
+    unreal.log_error('Job "{}" failed: {}'.format(job.get('skeletal_mesh_name'), error))
+    return {
+        'skeletal_mesh_name': job.get('skeletal_mesh_name'),
+        'status': 'failed',
+        'error': str(error),
+        'traceback': error_traceback,
+    }
+
+
+def main(manifest_path, result_path):
+    """Run every job in the manifest and record the outcome of each one in the result file.
+
+    A failing job is recorded and the run moves on to the next one, so one bad mesh does not cost the whole batch.
+    Unless the manifest sets ``group_by_skeleton`` to false, meshes sharing a Skeleton share the IKRig,
+    IKRetargeter and animations created for the first of them. Unless it sets ``fan_out`` to false, the source
+    animations are loaded once and sent to every IKRetargeter, ``fan_out_chunk_size`` sends them in chunks.
+    Packages loaded by every step are unloaded afterwards unless ``unload_between_jobs`` is false, in which case
+    they are only unloaded once resident memory goes over ``memory_ceiling_mb``. With ``quality_check`` every
+    retargeted animation is compared with its source and the ones over ``quality_thresholds`` are flagged, a flagged
+    animation is reported but does not fail its job.
+
+    :param manifest_path: Filepath to the json manifest.
+    :type manifest_path: str
+
+    :param result_path: Filepath to write the json result to.
+    :type result_path: str
+
+    :return: Number of jobs that failed, the full run result is in the result file.
+    :rtype: int
+    """
+    manifest = load_manifest(manifest_path)
+    jobs = manifest['jobs']
+    source_skeletal_mesh = manifest.get('source_skeletal_mesh', DEFAULT_SOURCE_SKELETAL_MESH)
+    source_animation_folder = manifest.get('source_animation_folder', ddrat.DEFAULT_SOURCE_ANIMATION_FOLDER)
+    result_store = ddirs.IKRigResultStore(manifest['result_store']) if manifest.get('result_store') else None
+    # A job without a sequence could only fail once everything else was done for it, fail it before any work
+    job_errors = collections.OrderedDict(
+        (job_index, (ValueError(MISSING_LEVEL_SEQUENCE_ERROR), None))
+        for job_index, job in enumerate(jobs) if not job.get('level_sequence')
+    )
+    if manifest.get('group_by_skeleton', True):
+        job_indices_by_skeleton, grouping_errors = group_jobs_by_skeleton(jobs)
+        job_errors.update(grouping_errors)
+        job_groups = list(job_indices_by_skeleton.values())
+    else:
+        job_groups = [[job_index] for job_index in range(len(jobs))]
+    job_groups = [[job_index for job_index in job_group if job_index not in job_errors] for job_group in job_groups]
+    job_groups = [job_group for job_group in job_groups if job_group]
+    memory_manager = ddbm.BatchMemoryManager(
+        memory_ceiling_mb=manifest.get('memory_ceiling_mb'),
+        unload_between_jobs=manifest.get('unload_between_jobs', True)
+    )
+
+    result = {
+        'manifest': os.path.abspath(manifest_path),
+        'source_skeletal_mesh': source_skeletal_mesh,
+        'jobs': [None] * len(jobs),
+    }
+    for job_index, (error, error_traceback) in job_errors.items():
+        result['jobs'][job_index] = get_failed_job_result(jobs[job_index], error, error_traceback)
+
+    # Create one IKRetargeter per group, the first mesh of the group to succeed provides it for the rest
+    shared_groups = []
+    for job_group in job_groups:
+        for job_index in job_group:
+            memory_manager.beginJob()
+            try:
+                retarget_assets = create_retargeter_assets(source_skeletal_mesh, jobs[job_index], result_store=result_store)
+            except Exception as error:
+                result['jobs'][job_index] = get_failed_job_result(jobs[job_index], error, traceback.format_exc())
+                result['jobs'][job_index]['memory'] = {'setup': memory_manager.endJob()}
+                continue
+            shared_groups.append({
+                'job_indices': [group_job_index for group_job_index in job_group if result['jobs'][group_job_index] is None],
+                'shared_from': get_target_skeletal_mesh(jobs[job_index]),
+                'target_base_folder': jobs[job_index]['skeletal_mesh_root_folder'],
+                'retarget_assets': retarget_assets,
+                'setup_memory': memory_manager.endJob(),
+            })
+            break
+    write_result(result_path, result)
+
+    memory_manager.beginJob()
+    # Every IKRetargeter reads the same source folder, query it once for this run and forget it afterwards
+    ddara.asset_registry_access.beginBatch()
+    try:
+        animations_by_group, source_asset_paths, errors_by_group = retarget_animations(
+            source_animation_folder,
+            [(shared_group['retarget_assets']['ik_retargeter'], shared_group['target_base_folder']) for shared_group in shared_groups],
+            fan_out=manifest.get('fan_out', True),
+            chunk_size=manifest.get('fan_out_chunk_size'),
+            memory_manager=memory_manager
+        )
+    finally:
+        ddara.asset_registry_access.endBatch()
+    result['retarget_memory'] = memory_manager.endJob()
+
+    if manifest.get('quality_check'):
+        for group_index, shared_group in enumerate(shared_groups):
+            if group_index in errors_by_group:
+                continue
+            memory_manager.beginJob()
+            try:
+                shared_group['quality'] = check_retarget_quality(
+                    shared_group['retarget_assets'],
+                    animations_by_group[group_index],
+                    source_asset_paths,
+                    thresholds=manifest.get('quality_thresholds')
+                )
+            except Exception as error:
+                # A broken check should not cost the animations that were already retargeted
+                unreal.log_error('Quality check of "{}" failed: {}'.format(shared_group['shared_from'], error))
+                shared_group['quality'] = {'error': str(error)}
+            shared_group['quality_memory'] = memory_manager.endJob()
+
+    for group_index, shared_group in enumerate(shared_groups):
+        for job_index in shared_group['job_indices']:
+            job = jobs[job_index]
+            if group_index in errors_by_group:
+                result['jobs'][job_index] = get_failed_job_result(job, errors_by_group[group_index])
+                result['jobs'][job_index]['memory'] = {'retarget': result['retarget_memory']}
+                result['jobs'][job_index]['peak_rss_mb'] = result['retarget_memory']['peak_rss_mb']
+                continue
+            job_result = {
+                'skeletal_mesh_name': job['skeletal_mesh_name'],
+                'skeletal_mesh': get_target_skeletal_mesh(job),
+                'animations': animations_by_group[group_index],
+            }
+            job_result.update(shared_group['retarget_assets'])
+            if 'quality' in shared_group:
+                job_result['quality'] = shared_group['quality']
+            # Every group is retargeted in one shared step, its peak is the peak this job's animations were made at
+            job_memory = {'retarget': result['retarget_memory']}
+            if job_result['skeletal_mesh'] != shared_group['shared_from']:
+                job_result['shared_from'] = shared_group['shared_from']
+            else:
+                job_memory['setup'] = shared_group['setup_memory']
+                if 'quality_memory' in shared_group:
+                    job_memory['quality'] = shared_group['quality_memory']
+            memory_manager.beginJob()
+            try:
+                job_result.update(bind_level_sequence(job, job_result['animations']))
+            except Exception as error:
+                job_result = get_failed_job_result(job, error, traceback.format_exc())
+            else:
+                job_result['status'] = 'succeeded'
+            job_memory['bind'] = memory_manager.endJob()
+            job_result['memory'] = job_memory
+            job_result['peak_rss_mb'] = max([step_memory['peak_rss_mb'] or 0 for step_memory in job_memory.values()]) or None
+            result['jobs'][job_index] = job_result
+            # Rewrite the result after every job so a crashed commandlet still leaves the finished jobs behind
+            write_result(result_path, result)
+
+    result['succeeded'] = len([job_result for job_result in result['jobs'] if job_result['status'] == 'succeeded'])
+    result['failed'] = len(result['jobs']) - result['succeeded']
+    result['flagged'] = len([job_result for job_result in result['jobs'] if job_result.get('quality', {}).get('flagged_sequences')])
+    write_result(result_path, result)
+    return result['failed']
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--manifest', default=os.environ.get('CAL_TEST_MANIFEST'), help='Json manifest of jobs to run.')
+    parser.add_argument('--result', default=os.environ.get('CAL_TEST_RESULT'), help='Json file the run result is written to.')
+    args = parser.parse_args()
+    if not args.manifest or not args.result:
+        parser.error('--manifest and --result are required')
+    # Exit non zero so launchers that only see the process status still notice failed jobs
+    if main(args.manifest, args.result):
+        sys.exit(1)
@@ -0,0 +1,171 @@
+"""Content addressed store of generated IKRig and IKRetargeter specs shared between workstations and farm nodes."""
+
+import hashlib
+import json
+import os
+import tempfile
+
+import unreal
+
+
+# Bump whenever chain detection, goal detection or chain mapping changes so stale results are not reused
+TOOL_VERSION = '1'
+
+
+def get_bone_hierarchy(loaded_skeletal_mesh):
+    """Read the reference skeleton of a SkeletalMesh, the bones its IKRig chains and goals are built from.
+
+    :param loaded_skeletal_mesh: Loaded SkeletalMesh uasset.
+    :type loaded_skeletal_mesh: :class:`unreal.SkeletalMesh`
+
+    :return: Bone names in hierarchy order and the index of every bone's parent, -1 for the root.
+    :rtype: tuple
+    """
+    # A transient component is the only editor API that exposes the parent of every bone of a mesh
+    skeletal_mesh_component = unreal.SkeletalMeshComponent()
+    skeletal_mesh_component.set_skeletal_mesh(loaded_skeletal_mesh)
+    bone_names = [str(skeletal_mesh_component.get_bone_name(bone_index)) for bone_index in range(skeletal_mesh_component.get_num_bones())]
+    bone_indices = dict((bone_name, bone_index) for bone_index, bone_name in enumerate(bone_names))
+    parent_indices = [bone_indices.get(str(skeletal_mesh_component.get_parent_bone(bone_name)), -1) for bone_name in bone_names]
+    return bone_names, parent_indices
+
+
+def hash_bone_hierarchy(bone_names, parent_indices):
+    """Hash a bone hierarchy, only names and parenting matter to chain detection so poses and uasset layout do not.
+
+    :param bone_names: Bone names in hierarchy order.
+    :type bone_names: list of str
+
+    :param parent_indices: Index of every bone's parent, -1 for the root.
+    :type parent_indices: list of int
+
+    :return: Hex digest of the hierarchy, None for an empty hierarchy.
+    :rtype: str
+    """
+    if not bone_names:
+        return None
+    skeleton_hash = hashlib.sha1()
+    for bone_name, parent_index in zip(bone_names, parent_indices):
+        skeleton_hash.update('{}\t{}\n'.format(bone_name, parent_index).encode('utf-8'))
+    return skeleton_hash.hexdigest()
+
+
+def get_skeleton_hash(loaded_skeletal_mesh):
+    """Hash the bone hierarchy of a SkeletalMesh so identical skeletons share results on every machine.
+
+    :param loaded_skeletal_mesh: Loaded SkeletalMesh uasset.
+    :type loaded_skeletal_mesh: :class:`unreal.SkeletalMesh`
+
+    :return: Hex digest of the ordered bone names and parent indices, None if the mesh has no bones.
+    :rtype: str
+    """
+    skeleton_hash = hash_bone_hierarchy(*get_bone_hierarchy(loaded_skeletal_mesh))
+    if not skeleton_hash:
+        unreal.log_warning('SkeletalMesh "{}" has no bones, skipping the result store...'.format(loaded_skeletal_mesh.get_path_name()))
+    return skeleton_hash
+
+
+class IKRigResultStore(object):
+    """Class used to pull and publish generated specs from a plain folder, usually on a mounted share."""
+
+    def __init__(self, store_folder):
+        """
+        :param store_folder: Folder the results are stored in, created if it does not exist.
+        :type store_folder: str
+        """
+        self.store_folder = store_folder
+
+    def getKey(self, skeleton_hash, source_rig='', tool_version=TOOL_VERSION):
+        """Build the key a result is stored under.
+
+        :param skeleton_hash: Hash of the Skeleton the result was generated for.
+        :type skeleton_hash: str
+
+        :param source_rig: Identifier of the source IKRig for retargeter results, empty for IKRig results.
+        :type source_rig: str
+
+        :param tool_version: Version of the tool that generated the result.
+        :type tool_version: str
+
+        :return: Hex digest identifying the result.
+        :rtype: str
+        """
+        key_hash = hashlib.sha1()
+        key_hash.update('\n'.join([skeleton_hash, source_rig, tool_version]).encode('utf-8'))
+        return key_hash.hexdigest()
+
+    def getResultPath(self, key):
+        """Get the file a result is stored in, results are fanned out into sub folders to keep folders small.
+
+        :param key: Key returned by :meth:`getKey`.
+        :type key: str
+
+        :return: Filepath of the result.
+        :rtype: str
+        """
+        return os.path.join(self.store_folder, key[:2], key + '.json')
+
+    def pull(self, skeleton_hash, source_rig=''):
+        """Get a previously published result.
+
+        :param skeleton_hash: Hash of the Skeleton the result was generated for.
+        :type skeleton_hash: str
+
+        :param source_rig: Identifier of the source IKRig for retargeter results, empty for IKRig results.
+        :type source_rig: str
+
+        :return: Stored spec, None if nothing was published for this key yet.
+        :rtype: dict
+        """
+        result_path = self.getResultPath(self.getKey(skeleton_hash, source_rig))
+        if not os.path.isfile(result_path):
+            return None
+        try:
+            with open(result_path, 'r') as result_file:
+                return json.load(result_file)['spec']
+        except (IOError, ValueError, KeyError) as error:
+            # A damaged result only costs a regeneration, it should never stop the pipeline
+            unreal.log_warning('Ignoring unreadable result "{}": {}'.format(result_path, error))
+            return None
+
+    def publish(self, skeleton_hash, spec, source_rig=''):
+        """Store a result so other machines can pull it instead of generating it again.
+
+        :param skeleton_hash: Hash of the Skeleton the result was generated for.
+        :type skeleton_hash: str
+
+        :param spec: Json serializable spec of the generated asset.
+        :type spec: dict
+
+        :param source_rig: Identifier of the source IKRig for retargeter results, empty for IKRig results.
+        :type source_rig: str
+
+        :return: Filepath the result was stored in.
+        :rtype: str
+        """
+        result_path = self.getResultPath(self.getKey(skeleton_hash, source_rig))
+        result_folder = os.path.dirname(result_path)
+        if not os.path.isdir(result_folder):
+            try:
+                os.makedirs(result_folder)
+            except OSError:
+                # Another machine may have created the folder in the meantime
+                if not os.path.isdir(result_folder):
+                    raise
+        result = {
+            'skeleton_hash': skeleton_hash,
+            'source_rig': source_rig,
+            'tool_version': TOOL_VERSION,
+            'spec': spec,
+        }
+        # Write next to the final file and swap it in so readers on other machines never see a partial result
+        file_descriptor, temporary_result_path = tempfile.mkstemp(suffix='.tmp', dir=result_folder)
+        try:
+            with os.fdopen(file_descriptor, 'w') as result_file:
+                json.dump(result, result_file, indent=4, sort_keys=True)
+            os.replace(temporary_result_path, result_path)
+        finally:
+            # Only left behind when the dump or the swap failed, never leak it onto the share
+            if os.path.exists(temporary_result_path):
+                os.remove(temporary_result_path)
+        return result_path
@@ -4,7 +4,7 @@ import os
 import subprocess
 
 
-def main(skeletal_mesh_name, asset_prefix, asset_type, skeletal_mesh_root_folder, asset_shortname):
+def main(skeletal_mesh_name, asset_prefix, asset_type, skeletal_mesh_root_folder, asset_shortname, assemble_all_clips=False):
     """Launch a detached batch process that will connect to Unreal remotely to send python modules to be executed.
     
     :param skeletal_mesh_name: Name of the asset that is selected in the content browser.
@@ -12,12 +12,16 @@ def main(skeletal_mesh_name, asset_prefix, asset_type, skeletal_mesh_root_folder
 
     :param skeletal_mesh_root_folder: Root folder that the selected asset exists in.
     :type skeletal_mesh_root_folder: str
+
+    :param assemble_all_clips: Lay every retargeted clip end to end in one sequence instead of only the last one.
+    :type assemble_all_clips: bool
     """
     os.environ["SKELETAL_MESH_NAME"] = skeletal_mesh_name
     os.environ["ASSET_PREFIX"] = asset_prefix
     os.environ["ASSET_TYPE"] = asset_type
     os.environ["SKELETAL_MESH_ROOT_FOLDER"] = skeletal_mesh_root_folder
     os.environ["ASSET_SHORTNAME"] = asset_shortname
+    os.environ["ASSEMBLE_ALL_CLIPS"] = "1" if assemble_all_clips else "0"
     si = subprocess.STARTUPINFO()
     si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
     subprocess.Popen(["C:\DD_Dev\common\python\dd_unreal\dd_unreal_auto_ik_retargeter\launch_remote_python.bat"], startupinfo=si)
@@ -2,7 +2,7 @@
 
 import os
 import sys
-sys.path.append(r'C:\DD\PU_V3\CustomEngines\UV52\5_3_1_Vanilla_E1\Engine\Plugins\Experimental\PythonScriptPlugin\Content\Python')
+sys.path.append(os.environ.get('UNREAL_PYTHON_PLUGIN_PATH', r'C:\DD\PU_V3\CustomEngines\UV52\5_3_1_Vanilla_E1\Engine\Plugins\Experimental\PythonScriptPlugin\Content\Python'))
 import remote_execution as remote
 
 if "ALLOW_DD_DEV" in os.environ:
@@ -12,11 +12,23 @@ if "ALLOW_DD_DEV" in os.environ:
 elif not [x for x in sys.path if x.endswith('dd_unreal')]:
     sys.path.append(r"C:\DD\common\python\dd_unreal")
 
+# Environment variables of this process that describe the job, handed to ``setup_cal_test.run_remote_job``
+REMOTE_JOB_ENVIRONMENT_KEYS = ['SKELETAL_MESH_NAME', 'ASSET_PREFIX', 'ASSET_TYPE', 'SKELETAL_MESH_ROOT_FOLDER', 'ASSET_SHORTNAME', 'ASSEMBLE_ALL_CLIPS', 'IK_RIG_RESULT_STORE', 'RERUN_STAGES']
+
 
 def main():
     """Send the IKRig Creation and Animation transfer remotely.
     """
-    ik_rig_creation_script = r"C:\DD_Dev\common\python\dd_unreal\dd_unreal_auto_ik_retargeter\setup_cal_test.py"
+    ik_rig_creation_script = os.environ.get('IK_RIG_CREATION_SCRIPT', r"C:\DD_Dev\common\python\dd_unreal\dd_unreal_auto_ik_retargeter\setup_cal_test.py")
+    # The job is handed to the script as an argument, setting it in the environment of the long lived editor would
+    # leak its variables into every later run
+    job_environment = {key: os.environ[key] for key in REMOTE_JOB_ENVIRONMENT_KEYS if key in os.environ}
+    # Loaded under its own name so its hand started entry point does not run, run_remote_job finishes the job before
+    # the command returns so the launcher sees it succeed or fail
+    ik_rig_creation_command = 'setup_cal_test_globals = {{"__name__": "setup_cal_test", "__file__": {script!r}}}; exec(open({script!r}).read(), setup_cal_test_globals); setup_cal_test_globals["run_remote_job"]({job_environment!r})'.format(
+        job_environment=job_environment,
+        script=ik_rig_creation_script
+    )
 
     remote_exec = remote.RemoteExecution()
     remote_exec.stop()  # Stops any existing connections that may exist from old jobs that did not have a stop
@@ -24,7 +36,7 @@ def main():
     # Starts the remote execution connection
     remote_exec.start()
     remote_exec.open_command_connection(remote_exec.remote_nodes)
-    remote_exec.run_command(command=ik_rig_creation_script, unattended=False, raise_on_failure=True)
+    remote_exec.run_command(command=ik_rig_creation_command, unattended=False, raise_on_failure=True)
     # Stops the newly created connection after command execution
     remote_exec.stop()
 
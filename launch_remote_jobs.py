@@ -0,0 +1,339 @@
+"""Submit IKRig creation and animation transfer jobs from Python 3 on any platform and wait for their results.
+
+Replaces the ``launch_bat_file`` -> ``launch_remote_python.bat`` -> ``C:\\Python27`` chain with a single process hop
+per job. Jobs run concurrently through asyncio subprocesses with a timeout, their stdout/stderr are captured and
+the exit status of the whole submission reflects every job::
+
+    python3 launch_remote_jobs.py jobs.json --config farm_config.json --max-concurrent-jobs 4
+
+``jobs.json`` is a list of job dicts. A ``headless`` job (the default) starts its own editor commandlet running
+``headless_cal_test.py`` with the job as a one entry manifest, it binds into an existing ``level_sequence`` instead
+of copying the turntable. A ``remote`` job runs ``launch_ik_rig_creation_remotely.py`` against an editor that is
+already running::
+
+    [
+        {
+            "mode": "headless",
+            "skeletal_mesh_name": "SK_CHA_Pv4Test_Main__Standard_Modeling",
+            "skeletal_mesh_root_folder": "/Game/Assets/Character/CHA_Pv4Test/CHA_Pv4Test_Main__Standard/Modeling/Meshes/v000",
+            "level_sequence": "/Game/Assets/Character/CHA_Pv4Test/Turntable/LS_CalTest"
+        }
+    ]
+
+Every path and the interpreter come from the config file, the command line or the environment instead of being
+hardcoded, see :data:`DEFAULT_CONFIG`.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+
+DEFAULT_CONFIG = {
+    # Interpreter used for remote jobs, defaults to the one running this launcher
+    'interpreter': os.environ.get('IK_RETARGETER_INTERPRETER', sys.executable),
+    # Editor commandlet executable and project used for headless jobs
+    'editor_executable': os.environ.get('UNREAL_EDITOR_CMD', ''),
+    'project_path': os.environ.get('UNREAL_PROJECT_PATH', ''),
+    # Folder holding the pipeline scripts
+    'script_folder': os.environ.get('IK_RETARGETER_SCRIPT_FOLDER', os.path.dirname(os.path.abspath(__file__))),
+    # Folder manifests and results are written to, a temporary folder is created when empty
+    'work_folder': os.environ.get('IK_RETARGETER_WORK_FOLDER', ''),
+    'editor_arguments': ['-unattended', '-nosplash', '-nullrhi', '-stdout', '-FullStdOutLogOutput'],
+    'timeout': 3600.0,
+    'max_concurrent_jobs': 1,
+}
+
+# Job keys forwarded to the remote script through the environment, mirrors ``launch_bat_file.main``
+REMOTE_JOB_ENVIRONMENT = {
+    'skeletal_mesh_name': 'SKELETAL_MESH_NAME',
+    'asset_prefix': 'ASSET_PREFIX',
+    'asset_type': 'ASSET_TYPE',
+    'skeletal_mesh_root_folder': 'SKELETAL_MESH_ROOT_FOLDER',
+    'asset_shortname': 'ASSET_SHORTNAME',
+    'assemble_all_clips': 'ASSEMBLE_ALL_CLIPS',
+    'result_store': 'IK_RIG_RESULT_STORE',
+    'rerun_stages': 'RERUN_STAGES',
+}
+
+
+def load_config(config_path=None, **overrides):
+    """Merge the default config, an optional json config file and explicit overrides.
+
+    :param config_path: Filepath to a json config file.
+    :type config_path: str
+
+    :return: Launcher config.
+    :rtype: dict
+    """
+    config = dict(DEFAULT_CONFIG)
+    if config_path:
+        with open(config_path, 'r') as config_file:
+            config.update(json.load(config_file))
+    config.update({key: value for key, value in overrides.items() if value is not None})
+    return config
+
+
+def get_job_name(job, job_index):
+    """Build a readable name for logs and results.
+
+    :param job: Job description.
+    :type job: dict
+
+    :param job_index: Position of the job in the submission.
+    :type job_index: int
+
+    :return: Job name.
+    :rtype: str
+    """
+    return '{:03d}_{}'.format(job_index, job.get('skeletal_mesh_name', 'job'))
+
+
+def build_remote_command(job, config):
+    """Build the command and environment for a job sent to an already running editor.
+
+    :param job: Job description.
+    :type job: dict
+
+    :param config: Launcher config.
+    :type config: dict
+
+    :return: Command arguments and the environment to run them with.
+    :rtype: tuple
+    """
+    command = [config['interpreter'], os.path.join(config['script_folder'], 'launch_ik_rig_creation_remotely.py')]
+    environment = dict(os.environ)
+    for job_key, environment_key in REMOTE_JOB_ENVIRONMENT.items():
+        if job_key not in job:
+            # Only the job decides its variables, not whatever the launcher inherited
+            environment.pop(environment_key, None)
+            continue
+        value = job[job_key]
+        if isinstance(value, bool):
+            value = '1' if value else '0'
+        elif isinstance(value, list):
+            value = ','.join(value)
+        environment[environment_key] = str(value)
+    return command, environment
+
+
+def build_headless_command(job, job_name, config):
+    """Write a one job manifest and build the editor commandlet command that runs it.
+
+    :param job: Job description.
+    :type job: dict
+
+    :param job_name: Name used for the manifest and result files.
+    :type job_name: str
+
+    :param config: Launcher config.
+    :type config: dict
+
+    :return: Command arguments, the environment to run them with and the result filepath.
+    :rtype: tuple
+    """
+    if not config['editor_executable'] or not config['project_path']:
+        raise ValueError('Headless jobs need "editor_executable" and "project_path" in the config')
+    manifest = {key: job[key] for key in ('source_skeletal_mesh', 'source_animation_folder', 'result_store', 'memory_ceiling_mb', 'unload_between_jobs', 'quality_check', 'quality_thresholds') if key in job}
+    manifest['jobs'] = [{key: value for key, value in job.items() if key != 'mode'}]
+    manifest_path = os.path.join(config['work_folder'], job_name + '_manifest.json')
+    result_path = os.path.join(config['work_folder'], job_name + '_result.json')
+    with open(manifest_path, 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=4)
+
+    # A result left in the work folder by an earlier submission must never be read as the result of this job
+    if os.path.exists(result_path):
+        os.remove(result_path)
+
+    # The commandlet cuts -script= at the first quote and re-quotes arguments with spaces, so only the bare script
+    # path goes there and the manifest and result reach headless_cal_test through the environment
+    command = [
+        config['editor_executable'],
+        config['project_path'],
+        '-run=pythonscript',
+        '-script={}'.format(os.path.join(config['script_folder'], 'headless_cal_test.py'))
+    ]
+    command.extend(config['editor_arguments'])
+    environment = dict(os.environ)
+    environment['CAL_TEST_MANIFEST'] = manifest_path
+    environment['CAL_TEST_RESULT'] = result_path
+    return command, environment, result_path
+
+
+def read_headless_result(result_path):
+    """Read the result file a headless job wrote.
+
+    :param result_path: Filepath of the json result.
+    :type result_path: str
+
+    :return: Run result, None if the commandlet never wrote one.
+    :rtype: dict
+    """
+    if not os.path.isfile(result_path):
+        return None
+    with open(result_path, 'r') as result_file:
+        return json.load(result_file)
+
+
+async def run_process(command, environment, timeout):
+    """Run a process, capture its output and kill it if it overruns the timeout.
+
+    :param command: Command arguments.
+    :type command: list of str
+
+    :param environment: Environment to run the process with.
+    :type environment: dict
+
+    :param timeout: Seconds to wait before the process is killed.
+    :type timeout: float
+
+    :return: Return code, stdout, stderr and whether the process timed out.
+    :rtype: tuple
+    """
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        env=environment
+    )
+    timed_out = False
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        timed_out = True
+        process.kill()
+        stdout, stderr = await process.communicate()
+    return process.returncode, stdout.decode('utf-8', 'replace'), stderr.decode('utf-8', 'replace'), timed_out
+
+
+async def run_job(job, job_index, config, semaphore):
+    """Run a single job once a concurrency slot is free.
+
+    :param job: Job description.
+    :type job: dict
+
+    :param job_index: Position of the job in the submission.
+    :type job_index: int
+
+    :param config: Launcher config.
+    :type config: dict
+
+    :param semaphore: Limits how many jobs run at once.
+    :type semaphore: :class:`asyncio.Semaphore`
+
+    :return: Job result.
+    :rtype: dict
+    """
+    job_name = get_job_name(job, job_index)
+    mode = job.get('mode', 'headless')
+    job_result = {'name': job_name, 'mode': mode, 'succeeded': False}
+    async with semaphore:
+        start_time = time.time()
+        try:
+            result_path = None
+            if mode == 'remote':
+                command, environment = build_remote_command(job, config)
+            elif mode == 'headless':
+                command, environment, result_path = build_headless_command(job, job_name, config)
+            else:
+                raise ValueError('Unknown job mode "{}"'.format(mode))
+            returncode, stdout, stderr, timed_out = await run_process(command, environment, config['timeout'])
+        except (OSError, ValueError) as error:
+            job_result['error'] = str(error)
+            job_result['returncode'] = None
+            return job_result
+        job_result['duration'] = time.time() - start_time
+
+    job_result.update({
+        'command': command,
+        'returncode': returncode,
+        'timed_out': timed_out,
+        'stdout': stdout,
+        'stderr': stderr,
+    })
+    job_result['succeeded'] = returncode == 0 and not timed_out
+    if result_path:
+        # The commandlet can exit cleanly while a job inside it failed, so trust the result file over the exit code
+        headless_result = read_headless_result(result_path)
+        job_result['result'] = headless_result
+        job_result['succeeded'] = job_result['succeeded'] and bool(headless_result) and not headless_result.get('failed')
+    return job_result
+
+
+async def run_jobs(jobs, config):
+    """Run every job, at most ``max_concurrent_jobs`` at a time.
+
+    :param jobs: Job descriptions.
+    :type jobs: list of dict
+
+    :param config: Launcher config.
+    :type config: dict
+
+    :return: Job results in submission order.
+    :rtype: list of dict
+    """
+    semaphore = asyncio.Semaphore(max(1, int(config['max_concurrent_jobs'])))
+    return await asyncio.gather(*[run_job(job, job_index, config, semaphore) for job_index, job in enumerate(jobs)])
+
+
+def main(jobs, config):
+    """Submit the jobs and block until all of them finished.
+
+    :param jobs: Job descriptions.
+    :type jobs: list of dict
+
+    :param config: Launcher config.
+    :type config: dict
+
+    :return: Job results in submission order.
+    :rtype: list of dict
+    """
+    if not config['work_folder']:
+        config = dict(config, work_folder=tempfile.mkdtemp(prefix='ik_retargeter_jobs_'))
+    elif not os.path.isdir(config['work_folder']):
+        os.makedirs(config['work_folder'])
+    return asyncio.run(run_jobs(jobs, config))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('jobs', help='Json file holding a list of jobs.')
+    parser.add_argument('--config', help='Json config file, see DEFAULT_CONFIG for the keys.')
+    parser.add_argument('--interpreter')
+    parser.add_argument('--editor-executable')
+    parser.add_argument('--project-path')
+    parser.add_argument('--script-folder')
+    parser.add_argument('--work-folder')
+    parser.add_argument('--timeout', type=float)
+    parser.add_argument('--max-concurrent-jobs', type=int)
+    parser.add_argument('--report', help='Json file the job results are written to.')
+    args = parser.parse_args()
+
+    launcher_config = load_config(
+        args.config,
+        interpreter=args.interpreter,
+        editor_executable=args.editor_executable,
+        project_path=args.project_path,
+        script_folder=args.script_folder,
+        work_folder=args.work_folder,
+        timeout=args.timeout,
+        max_concurrent_jobs=args.max_concurrent_jobs
+    )
+    with open(args.jobs, 'r') as jobs_file:
+        job_results = main(json.load(jobs_file), launcher_config)
+
+    for job_result in job_results:
+        print('{}: {}'.format(job_result['name'], 'succeeded' if job_result['succeeded'] else 'failed'))
+        if not job_result['succeeded']:
+            sys.stderr.write((job_result.get('stderr') or job_result.get('error') or '').rstrip() + '\n')
+    if args.report:
+        with open(args.report, 'w') as report_file:
+            json.dump(job_results, report_file, indent=4)
+    # Propagate the first failing exit code, fall back to 1 for timeouts and jobs that failed inside the editor
+    failed_job_results = [job_result for job_result in job_results if not job_result['succeeded']]
+    if failed_job_results:
+        sys.exit(failed_job_results[0].get('returncode') or 1)
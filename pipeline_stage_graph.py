@@ -0,0 +1,238 @@
+"""Run the retarget pipeline as a graph of stages that only rerun when something upstream of them changed."""
+
+import hashlib
+import json
+import os
+
+
+class Stage(object):
+    """A single step of the pipeline, its inputs and the outputs it produces."""
+
+    def __init__(self, name, function, inputs, outputs, version='1', is_valid=None):
+        """
+        :param name: Unique name of the stage.
+        :type name: str
+
+        :param function: Called with every input as a keyword argument, must return a dict holding every output.
+        :type function: callable
+
+        :param inputs: Names of the graph parameters or stage outputs the stage reads.
+        :type inputs: list of str
+
+        :param outputs: Names of the json serializable values the stage produces.
+        :type outputs: list of str
+
+        :param version: Bump to invalidate cached outputs when the stage logic changes.
+        :type version: str
+
+        :param is_valid: Called with the cached outputs, returns False when they can not be reused (deleted assets).
+        :type is_valid: callable
+        """
+        self.name = name
+        self.function = function
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.version = version
+        self.is_valid = is_valid
+
+
+class StageGraph(object):
+    """Class used to order stages by their dependencies, cache their outputs and run the ones that are stale."""
+
+    def __init__(self, cache_path=None):
+        """
+        :param cache_path: Json file stage outputs are cached in between runs, nothing is cached when not given.
+        :type cache_path: str
+        """
+        self.cache_path = cache_path
+        self.stages = []
+        self.stage_by_output = {}
+
+    def addStage(self, stage):
+        """Add a stage, its outputs become available as inputs to stages added after or before it.
+
+        :param stage: Stage to add.
+        :type stage: :class:`Stage`
+        """
+        for output in stage.outputs:
+            if output in self.stage_by_output:
+                raise ValueError('Output "{}" of stage "{}" is already produced by stage "{}"'.format(output, stage.name, self.stage_by_output[output].name))
+            self.stage_by_output[output] = stage
+        self.stages.append(stage)
+
+    def getUpstreamStages(self, stage):
+        """Get the stages that produce the inputs of a stage.
+
+        :param stage: Stage to look up.
+        :type stage: :class:`Stage`
+
+        :return: Stages the stage depends on.
+        :rtype: list of :class:`Stage`
+        """
+        upstream_stages = []
+        for stage_input in stage.inputs:
+            upstream_stage = self.stage_by_output.get(stage_input)
+            if upstream_stage and upstream_stage not in upstream_stages:
+                upstream_stages.append(upstream_stage)
+        return upstream_stages
+
+    def getExecutionLayers(self):
+        """Sort the stages into layers where every stage only depends on stages from earlier layers.
+
+        :return: Layers of stages, stages within a layer are independent of each other.
+        :rtype: list of list of :class:`Stage`
+        """
+        layers = []
+        placed_stages = []
+        remaining_stages = list(self.stages)
+        while remaining_stages:
+            layer = [
+                stage for stage in remaining_stages
+                if all(upstream_stage in placed_stages for upstream_stage in self.getUpstreamStages(stage))
+            ]
+            if not layer:
+                raise ValueError('Stages {} depend on each other in a cycle'.format([stage.name for stage in remaining_stages]))
+            layers.append(layer)
+            placed_stages.extend(layer)
+            remaining_stages = [stage for stage in remaining_stages if stage not in layer]
+        return layers
+
+    def getFingerprint(self, stage, values, fingerprints):
+        """Fingerprint a stage from its inputs and from the fingerprints of the stages that produced them.
+
+        Upstream fingerprints are part of the hash so a change anywhere upstream reaches every stage below it.
+
+        :param stage: Stage to fingerprint.
+        :type stage: :class:`Stage`
+
+        :param values: Every parameter and output known so far.
+        :type values: dict
+
+        :param fingerprints: Fingerprints of the stages that already ran or were reused.
+        :type fingerprints: dict
+
+        :return: Hex digest of the stage inputs.
+        :rtype: str
+        """
+        fingerprint_data = {
+            'stage': stage.name,
+            'version': stage.version,
+            'inputs': {stage_input: values.get(stage_input) for stage_input in stage.inputs},
+            'upstream': {upstream_stage.name: fingerprints[upstream_stage.name] for upstream_stage in self.getUpstreamStages(stage)},
+        }
+        return hashlib.sha1(json.dumps(fingerprint_data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def loadCache(self):
+        """Read the cached stage outputs from the previous runs.
+
+        :return: Stage name to its cached fingerprint and outputs.
+        :rtype: dict
+        """
+        if not self.cache_path or not os.path.isfile(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, 'r') as cache_file:
+                return json.load(cache_file)
+        except (IOError, ValueError):
+            # A damaged cache only means every stage runs again
+            return {}
+
+    def saveCache(self, cache):
+        """Write the stage outputs so a later run can reuse them.
+
+        :param cache: Stage name to its fingerprint and outputs.
+        :type cache: dict
+        """
+        if not self.cache_path:
+            return
+        cache_folder = os.path.dirname(os.path.abspath(self.cache_path))
+        if not os.path.isdir(cache_folder):
+            os.makedirs(cache_folder)
+        temporary_cache_path = self.cache_path + '.tmp'
+        with open(temporary_cache_path, 'w') as cache_file:
+            json.dump(cache, cache_file, indent=4, sort_keys=True)
+        os.replace(temporary_cache_path, self.cache_path)
+
+    def runStage(self, stage, values):
+        """Call a stage with its inputs and check it produced every declared output.
+
+        :param stage: Stage to run.
+        :type stage: :class:`Stage`
+
+        :param values: Every parameter and output known so far.
+        :type values: dict
+
+        :return: Outputs of the stage.
+        :rtype: dict
+        """
+        stage_outputs = stage.function(**{stage_input: values.get(stage_input) for stage_input in stage.inputs}) or {}
+        missing_outputs = [output for output in stage.outputs if output not in stage_outputs]
+        if missing_outputs:
+            raise ValueError('Stage "{}" did not produce {}'.format(stage.name, missing_outputs))
+        return {output: stage_outputs[output] for output in stage.outputs}
+
+    def run(self, parameters, rerun_stages=None):
+        """Run every stale stage and reuse the cached outputs of the others.
+
+        :param parameters: Values for every stage input that is not produced by another stage.
+        :type parameters: dict
+
+        :param rerun_stages: Names of stages to run even when their cached outputs are still valid.
+        :type rerun_stages: list of str
+
+        :return: Every parameter and stage output.
+        :rtype: dict
+        """
+        rerun_stages = rerun_stages or []
+        cache = self.loadCache()
+        values = dict(parameters)
+        fingerprints = {}
+        self.stage_states = {}
+        for layer in self.getExecutionLayers():
+            stale_stages = []
+            for stage in layer:
+                fingerprints[stage.name] = self.getFingerprint(stage, values, fingerprints)
+                cached_stage = cache.get(stage.name)
+                # A stage that ran may have rewritten assets in place, so everything downstream of it runs as well
+                upstream_ran = any(self.stage_states.get(upstream_stage.name) == 'ran' for upstream_stage in self.getUpstreamStages(stage))
+                if (
+                    stage.name not in rerun_stages
+                    and not upstream_ran
+                    and cached_stage
+                    and cached_stage['fingerprint'] == fingerprints[stage.name]
+                    and (not stage.is_valid or stage.is_valid(cached_stage['outputs']))
+                ):
+                    values.update(cached_stage['outputs'])
+                    self.stage_states[stage.name] = 'cached'
+                else:
+                    stale_stages.append(stage)
+
+            # Stages call the editor API, which is game thread only, so even independent stages run one after another
+            for stage in stale_stages:
+                self.storeStageOutputs(stage, self.runStage(stage, values), fingerprints, values, cache)
+        return values
+
+    def storeStageOutputs(self, stage, stage_outputs, fingerprints, values, cache):
+        """Record the outputs of a stage that just ran and write them to the cache straight away.
+
+        Writing after every stage means a failure in a late stage keeps the work of every earlier stage.
+
+        :param stage: Stage that ran.
+        :type stage: :class:`Stage`
+
+        :param stage_outputs: Outputs of the stage.
+        :type stage_outputs: dict
+
+        :param fingerprints: Stage name to fingerprint for this run.
+        :type fingerprints: dict
+
+        :param values: Every parameter and output known so far.
+        :type values: dict
+
+        :param cache: Stage name to its fingerprint and outputs.
+        :type cache: dict
+        """
+        values.update(stage_outputs)
+        cache[stage.name] = {'fingerprint': fingerprints[stage.name], 'outputs': stage_outputs}
+        self.stage_states[stage.name] = 'ran'
+        self.saveCache(cache)
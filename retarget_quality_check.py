@@ -0,0 +1,567 @@
+"""Compare retargeted AnimSequences with their source and flag the ones that need a closer look before render time."""
+
+import collections
+import math
+
+import unreal
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+DEFAULT_SAMPLE_COUNT = 64
+DEFAULT_FOOT_CHAIN_NAMES = ('LeftLeg', 'RightLeg')
+# Trajectory error and foot sliding are in chain lengths, joint limit violations are the fraction of frames
+DEFAULT_THRESHOLDS = {
+    'trajectory_error': 0.25,
+    'foot_sliding': 0.15,
+    'joint_limit_violations': 0.05,
+}
+
+
+def rotate_vectors(rotations, vectors):
+    """Rotate vectors by quaternions.
+
+    :param rotations: Quaternions as x, y, z, w, shape (..., 4).
+    :type rotations: :class:`numpy.ndarray`
+
+    :param vectors: Vectors to rotate, shape (..., 3).
+    :type vectors: :class:`numpy.ndarray`
+
+    :return: Rotated vectors, shape (..., 3).
+    :rtype: :class:`numpy.ndarray`
+    """
+    axes = rotations[..., :3]
+    twice_cross = 2.0 * np.cross(axes, vectors)
+    return vectors + rotations[..., 3:] * twice_cross + np.cross(axes, twice_cross)
+
+
+def multiply_quaternions(first_rotations, second_rotations):
+    """Combine quaternions so the second rotation is applied first.
+
+    :param first_rotations: Quaternions as x, y, z, w, shape (..., 4).
+    :type first_rotations: :class:`numpy.ndarray`
+
+    :param second_rotations: Quaternions as x, y, z, w, shape (..., 4).
+    :type second_rotations: :class:`numpy.ndarray`
+
+    :return: Combined quaternions, shape (..., 4).
+    :rtype: :class:`numpy.ndarray`
+    """
+    first_axes, first_w = first_rotations[..., :3], first_rotations[..., 3:]
+    second_axes, second_w = second_rotations[..., :3], second_rotations[..., 3:]
+    axes = first_w * second_axes + second_w * first_axes + np.cross(first_axes, second_axes)
+    w = first_w * second_w - np.sum(first_axes * second_axes, axis=-1, keepdims=True)
+    return np.concatenate([axes, w], axis=-1)
+
+
+def compose_component_space(translations, rotations, scales, parent_indices):
+    """Turn parent space bone transforms into component space bone positions for every sampled frame at once.
+
+    :param translations: Parent space translations, shape (frames, bones, 3).
+    :type translations: :class:`numpy.ndarray`
+
+    :param rotations: Parent space quaternions as x, y, z, w, shape (frames, bones, 4).
+    :type rotations: :class:`numpy.ndarray`
+
+    :param scales: Parent space scales, shape (frames, bones, 3).
+    :type scales: :class:`numpy.ndarray`
+
+    :param parent_indices: Index of every bone's parent, -1 for the root, parents must come before their children.
+    :type parent_indices: list of int
+
+    :return: Component space positions, shape (frames, bones, 3).
+    :rtype: :class:`numpy.ndarray`
+    """
+    positions = np.empty_like(translations)
+    component_rotations = np.empty_like(rotations)
+    component_scales = np.empty_like(scales)
+    for bone_index, parent_index in enumerate(parent_indices):
+        if parent_index < 0:
+            positions[:, bone_index] = translations[:, bone_index]
+            component_rotations[:, bone_index] = rotations[:, bone_index]
+            component_scales[:, bone_index] = scales[:, bone_index]
+            continue
+        parent_rotations = component_rotations[:, parent_index]
+        parent_scales = component_scales[:, parent_index]
+        positions[:, bone_index] = positions[:, parent_index] + rotate_vectors(parent_rotations, parent_scales * translations[:, bone_index])
+        component_rotations[:, bone_index] = multiply_quaternions(parent_rotations, rotations[:, bone_index])
+        component_scales[:, bone_index] = parent_scales * scales[:, bone_index]
+    return positions
+
+
+def get_chain_length(chain_positions):
+    """Measure a chain on its first sampled frame.
+
+    :param chain_positions: Component space positions of the chain bones from start to end, shape (frames, bones, 3).
+    :type chain_positions: :class:`numpy.ndarray`
+
+    :return: Summed length of the chain segments.
+    :rtype: float
+    """
+    return float(np.linalg.norm(np.diff(chain_positions[0], axis=0), axis=-1).sum())
+
+
+def get_reference_alignment(source_reference_points, target_reference_points):
+    """Find the rotation that turns the source component axes into the target ones from the reference poses.
+
+    Rigs are not all imported with the Mannequin axes, so offsets can only be compared once they are in the same
+    frame. The best fitting rotation between the chain start and end points of both reference poses is used, each
+    centered on its own points and scaled to its own size so proportions do not count.
+
+    :param source_reference_points: Source reference pose chain points, shape (points, 3).
+    :type source_reference_points: :class:`numpy.ndarray`
+
+    :param target_reference_points: Matching target reference pose chain points, shape (points, 3).
+    :type target_reference_points: :class:`numpy.ndarray`
+
+    :return: Rotation matrix taking source directions to target directions, None when the points lie on a line
+        and the rotation around it is unknown.
+    :rtype: :class:`numpy.ndarray`
+    """
+    source_points = source_reference_points - source_reference_points.mean(axis=0)
+    target_points = target_reference_points - target_reference_points.mean(axis=0)
+    source_size = np.linalg.norm(source_points)
+    target_size = np.linalg.norm(target_points)
+    if not source_size or not target_size:
+        return None
+    left_vectors, singular_values, right_vectors = np.linalg.svd(np.dot((source_points / source_size).T, target_points / target_size))
+    if singular_values[1] <= 1e-6 * singular_values[0]:
+        return None
+    # Flip the weakest axis when the best fit is a reflection, a rig never mirrors its axes
+    handedness = np.diag([1.0, 1.0, np.sign(np.linalg.det(np.dot(right_vectors.T, left_vectors.T)))])
+    return np.dot(right_vectors.T, np.dot(handedness, left_vectors.T))
+
+
+def get_trajectory_errors(source_chain_positions, target_chain_positions, alignment=None):
+    """Compare where the chain end sits relative to the chain start, in chain lengths so proportions do not count.
+
+    :param source_chain_positions: Source chain positions from start to end, shape (frames, bones, 3).
+    :type source_chain_positions: :class:`numpy.ndarray`
+
+    :param target_chain_positions: Target chain positions from start to end, shape (frames, bones, 3).
+    :type target_chain_positions: :class:`numpy.ndarray`
+
+    :param alignment: Rotation from the source to the target component axes, see :func:`get_reference_alignment`.
+        The axes are taken to match when it is None.
+    :type alignment: :class:`numpy.ndarray`
+
+    :return: Error of every frame, NaN when either chain has no length.
+    :rtype: :class:`numpy.ndarray`
+    """
+    source_length = get_chain_length(source_chain_positions)
+    target_length = get_chain_length(target_chain_positions)
+    if not source_length or not target_length:
+        return np.full(len(source_chain_positions), np.nan)
+    source_offsets = (source_chain_positions[:, -1] - source_chain_positions[:, 0]) / source_length
+    target_offsets = (target_chain_positions[:, -1] - target_chain_positions[:, 0]) / target_length
+    if alignment is not None:
+        source_offsets = np.dot(source_offsets, alignment.T)
+    return np.linalg.norm(source_offsets - target_offsets, axis=-1)
+
+
+def get_foot_sliding(source_foot_positions, target_foot_positions, source_leg_length, target_leg_length, contact_height=0.05, contact_speed=0.02):
+    """Measure how much further the target foot moves along the ground than the source foot while it is planted.
+
+    The source foot counts as planted when it is near its lowest point of the clip and barely moves between samples.
+    Whatever the source foot drifts while planted is subtracted so only sliding added by the retarget counts.
+
+    :param source_foot_positions: Component space positions of the source foot, shape (frames, 3).
+    :type source_foot_positions: :class:`numpy.ndarray`
+
+    :param target_foot_positions: Component space positions of the target foot, shape (frames, 3).
+    :type target_foot_positions: :class:`numpy.ndarray`
+
+    :param source_leg_length: Length of the source leg chain.
+    :type source_leg_length: float
+
+    :param target_leg_length: Length of the target leg chain.
+    :type target_leg_length: float
+
+    :param contact_height: Height above its lowest point the source foot may be at while planted, in leg lengths.
+    :type contact_height: float
+
+    :param contact_speed: Distance the source foot may move between samples while planted, in leg lengths.
+    :type contact_speed: float
+
+    :return: Extra distance the target foot slid over the clip in leg lengths, NaN when either leg has no length.
+    :rtype: float
+    """
+    if not source_leg_length or not target_leg_length:
+        return float('nan')
+    source_heights = source_foot_positions[:, 2] - source_foot_positions[:, 2].min()
+    source_steps = np.linalg.norm(np.diff(source_foot_positions[:, :2], axis=0), axis=-1)
+    target_steps = np.linalg.norm(np.diff(target_foot_positions[:, :2], axis=0), axis=-1)
+    # A step is planted when the foot is low at both of its samples and barely moved in between
+    is_low = source_heights <= contact_height * source_leg_length
+    is_planted = is_low[:-1] & is_low[1:] & (source_steps <= contact_speed * source_leg_length)
+    return float(max(0.0, target_steps[is_planted].sum() / target_leg_length - source_steps[is_planted].sum() / source_leg_length))
+
+
+def get_bend_angles(chain_positions):
+    """Get the angle between the first and last segment of a chain, the elbow or knee angle for limbs.
+
+    :param chain_positions: Chain positions from start to end, shape (frames, bones, 3).
+    :type chain_positions: :class:`numpy.ndarray`
+
+    :return: Bend angle of every frame in degrees, None for chains with fewer than three bones.
+    :rtype: :class:`numpy.ndarray`
+    """
+    if chain_positions.shape[1] < 3:
+        return None
+    first_segments = chain_positions[:, 1] - chain_positions[:, 0]
+    last_segments = chain_positions[:, -1] - chain_positions[:, -2]
+    cosines = np.sum(first_segments * last_segments, axis=-1) / (
+        np.linalg.norm(first_segments, axis=-1) * np.linalg.norm(last_segments, axis=-1)
+    )
+    return np.degrees(np.arccos(np.clip(cosines, -1.0, 1.0)))
+
+
+def get_joint_limit_violations(source_chain_positions, target_chain_positions, tolerance=15.0):
+    """Count the frames a target chain bends further than the source chain ever does in the clip.
+
+    The rigs carry no authored joint limits, so the range the source animation covers stands in for them.
+
+    :param source_chain_positions: Source chain positions from start to end, shape (frames, bones, 3).
+    :type source_chain_positions: :class:`numpy.ndarray`
+
+    :param target_chain_positions: Target chain positions from start to end, shape (frames, bones, 3).
+    :type target_chain_positions: :class:`numpy.ndarray`
+
+    :param tolerance: Degrees the target may go past the source range.
+    :type tolerance: float
+
+    :return: Fraction of frames outside the range, NaN when either chain is too short to bend.
+    :rtype: float
+    """
+    source_bend_angles = get_bend_angles(source_chain_positions)
+    target_bend_angles = get_bend_angles(target_chain_positions)
+    if source_bend_angles is None or target_bend_angles is None:
+        return float('nan')
+    is_violation = (
+        (target_bend_angles < source_bend_angles.min() - tolerance)
+        | (target_bend_angles > source_bend_angles.max() + tolerance)
+    )
+    return float(is_violation.mean())
+
+
+def get_metric_value(value):
+    """Make a metric json serializable.
+
+    :param value: Metric value.
+    :type value: float
+
+    :return: Rounded value, None when the metric could not be measured.
+    :rtype: float
+    """
+    value = float(value)
+    return None if math.isnan(value) else round(value, 4)
+
+
+def get_chain_bones(ik_rig):
+    """Get the start and end bone of every retarget chain of an IKRig.
+
+    :param ik_rig: Loaded IKRig uasset.
+    :type ik_rig: :class:`unreal.IKRigDefinition`
+
+    :return: Chain name to its start and end bone names.
+    :rtype: dict
+    """
+    chain_bones = {}
+    for bone_chain in unreal.IKRigController.get_controller(ik_rig).get_retarget_chains():
+        chain_bones[str(bone_chain.chain_name)] = (str(bone_chain.start_bone.bone_name), str(bone_chain.end_bone.bone_name))
+    return chain_bones
+
+
+def get_chain_mapping(ik_retargeter, target_ik_rig):
+    """Read which source chain every target chain of an IKRetargeter is mapped to.
+
+    :param ik_retargeter: Loaded IKRetargeter uasset.
+    :type ik_retargeter: :class:`unreal.IKRetargeter`
+
+    :param target_ik_rig: Loaded target IKRig uasset.
+    :type target_ik_rig: :class:`unreal.IKRigDefinition`
+
+    :return: Target chain name to source chain name pairs, unmapped chains are left out.
+    :rtype: dict
+    """
+    retargeter_controller = unreal.IKRetargeterController.get_controller(ik_retargeter)
+    chain_mapping = {}
+    for bone_chain in unreal.IKRigController.get_controller(target_ik_rig).get_retarget_chains():
+        source_chain_name = str(retargeter_controller.get_source_chain(bone_chain.chain_name))
+        if source_chain_name and source_chain_name != 'None':
+            chain_mapping[str(bone_chain.chain_name)] = source_chain_name
+    return chain_mapping
+
+
+class RetargetQualityCheck(object):
+    """Class used to sample source and retargeted animations and measure how well every chain was transferred."""
+
+    def __init__(self, thresholds=None, sample_count=DEFAULT_SAMPLE_COUNT, foot_chain_names=DEFAULT_FOOT_CHAIN_NAMES):
+        """
+        :param thresholds: Metric name to the value above which a sequence is flagged, see :data:`DEFAULT_THRESHOLDS`.
+        :type thresholds: dict
+
+        :param sample_count: Number of evenly spaced frames sampled from every sequence.
+        :type sample_count: int
+
+        :param foot_chain_names: Target chains whose end bone is checked for foot sliding.
+        :type foot_chain_names: tuple of str
+        """
+        if np is None:
+            raise ImportError('numpy is needed for the retarget quality check, install it into the editor Python')
+        self.thresholds = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+        self.sample_count = sample_count
+        self.foot_chain_names = foot_chain_names
+
+    def getChainPaths(self, anim_sequence, chain_bones):
+        """Find the bones between the start and end bone of every chain.
+
+        :param anim_sequence: Loaded AnimSequence uasset of the skeleton the chains belong to.
+        :type anim_sequence: :class:`unreal.AnimSequence`
+
+        :param chain_bones: Chain name to its start and end bone names.
+        :type chain_bones: dict
+
+        :return: Chain name to its bone names from start to end and every bone up to the root, parents first.
+        :rtype: tuple
+        """
+        chain_paths = {}
+        root_paths = {}
+        for chain_name, (start_bone_name, end_bone_name) in chain_bones.items():
+            root_path = [str(bone_name) for bone_name in reversed(unreal.AnimationLibrary.find_bone_path_to_root(anim_sequence, end_bone_name))]
+            if start_bone_name not in root_path:
+                unreal.log_warning('Chain "{}" end "{}" is not below its start "{}", skipping it...'.format(chain_name, end_bone_name, start_bone_name))
+                continue
+            chain_paths[chain_name] = root_path[root_path.index(start_bone_name):]
+            root_paths[chain_name] = root_path
+
+        # Every root path starts at the root, so walking them in order always meets a parent before its children
+        parent_by_bone = collections.OrderedDict()
+        for root_path in root_paths.values():
+            for path_index, bone_name in enumerate(root_path):
+                if bone_name not in parent_by_bone:
+                    parent_by_bone[bone_name] = root_path[path_index - 1] if path_index else None
+        return chain_paths, parent_by_bone
+
+    def sampleChains(self, anim_sequence, chain_bones, sample_times):
+        """Sample the component space positions of every chain bone at the given times.
+
+        :param anim_sequence: Loaded AnimSequence uasset.
+        :type anim_sequence: :class:`unreal.AnimSequence`
+
+        :param chain_bones: Chain name to its start and end bone names.
+        :type chain_bones: dict
+
+        :param sample_times: Times in seconds to sample at, None to sample the reference pose of the skeleton once.
+        :type sample_times: :class:`numpy.ndarray`
+
+        :return: Chain name to the positions of its bones from start to end, shape (frames, bones, 3).
+        :rtype: dict
+        """
+        chain_paths, parent_by_bone = self.getChainPaths(anim_sequence, chain_bones)
+        bone_names = list(parent_by_bone)
+        bone_indices = {bone_name: bone_index for bone_index, bone_name in enumerate(bone_names)}
+        parent_indices = [bone_indices[parent] if parent else -1 for parent in parent_by_bone.values()]
+
+        if sample_times is None:
+            reference_pose = unreal.AnimPoseExtensions.get_reference_pose(anim_sequence.get_editor_property('skeleton'))
+            sampled_bone_poses = [[
+                unreal.AnimPoseExtensions.get_bone_pose(reference_pose, bone_name, unreal.AnimPoseSpaces.LOCAL)
+                for bone_name in bone_names
+            ]]
+        else:
+            sampled_bone_poses = [
+                unreal.AnimationLibrary.get_bone_poses_for_time(anim_sequence, bone_names, float(sample_time), False)
+                for sample_time in sample_times
+            ]
+        translations = np.empty((len(sampled_bone_poses), len(bone_names), 3))
+        rotations = np.empty((len(sampled_bone_poses), len(bone_names), 4))
+        scales = np.empty((len(sampled_bone_poses), len(bone_names), 3))
+        for sample_index, bone_poses in enumerate(sampled_bone_poses):
+            for bone_index, bone_pose in enumerate(bone_poses):
+                translations[sample_index, bone_index] = (bone_pose.translation.x, bone_pose.translation.y, bone_pose.translation.z)
+                rotations[sample_index, bone_index] = (bone_pose.rotation.x, bone_pose.rotation.y, bone_pose.rotation.z, bone_pose.rotation.w)
+                scales[sample_index, bone_index] = (bone_pose.scale3d.x, bone_pose.scale3d.y, bone_pose.scale3d.z)
+        positions = compose_component_space(translations, rotations, scales, parent_indices)
+        return {
+            chain_name: positions[:, [bone_indices[bone_name] for bone_name in chain_path]]
+            for chain_name, chain_path in chain_paths.items()
+        }
+
+    def getAlignment(self, source_anim_sequence, target_anim_sequence, source_chain_bones, target_chain_bones, chain_mapping, mapped_chains):
+        """Find the rotation between the component axes of both skeletons from the chains of their reference poses.
+
+        :param source_anim_sequence: Loaded source AnimSequence uasset.
+        :type source_anim_sequence: :class:`unreal.AnimSequence`
+
+        :param target_anim_sequence: Loaded retargeted AnimSequence uasset.
+        :type target_anim_sequence: :class:`unreal.AnimSequence`
+
+        :param source_chain_bones: Source chain name to its start and end bone names.
+        :type source_chain_bones: dict
+
+        :param target_chain_bones: Target chain name to its start and end bone names.
+        :type target_chain_bones: dict
+
+        :param chain_mapping: Target chain name to source chain name pairs.
+        :type chain_mapping: dict
+
+        :param mapped_chains: Target chains that have a source chain on both skeletons.
+        :type mapped_chains: list of str
+
+        :return: Rotation matrix from the source to the target component axes, None when the chains can not tell.
+        :rtype: :class:`numpy.ndarray`
+        """
+        source_reference = self.sampleChains(source_anim_sequence, {chain_mapping[chain_name]: source_chain_bones[chain_mapping[chain_name]] for chain_name in mapped_chains}, None)
+        target_reference = self.sampleChains(target_anim_sequence, {chain_name: target_chain_bones[chain_name] for chain_name in mapped_chains}, None)
+        source_points = []
+        target_points = []
+        for target_chain_name in mapped_chains:
+            source_chain_name = chain_mapping[target_chain_name]
+            if target_chain_name in target_reference and source_chain_name in source_reference:
+                source_points.extend(source_reference[source_chain_name][0, [0, -1]])
+                target_points.extend(target_reference[target_chain_name][0, [0, -1]])
+        if not source_points:
+            return None
+        alignment = get_reference_alignment(np.array(source_points), np.array(target_points))
+        if alignment is None:
+            unreal.log_warning('Could not align the axes of "{}" and "{}" from their chains, comparing them as they are...'.format(
+                source_anim_sequence.get_path_name(), target_anim_sequence.get_path_name()
+            ))
+        return alignment
+
+    def getChainMetrics(self, source_chain_positions, target_chain_positions, is_foot_chain, alignment=None):
+        """Measure one mapped chain.
+
+        :param source_chain_positions: Source chain positions from start to end, shape (frames, bones, 3).
+        :type source_chain_positions: :class:`numpy.ndarray`
+
+        :param target_chain_positions: Target chain positions from start to end, shape (frames, bones, 3).
+        :type target_chain_positions: :class:`numpy.ndarray`
+
+        :param is_foot_chain: Whether the chain ends in a foot that should stay planted.
+        :type is_foot_chain: bool
+
+        :param alignment: Rotation from the source to the target component axes.
+        :type alignment: :class:`numpy.ndarray`
+
+        :return: Metric name to its value, None for metrics that do not apply to the chain.
+        :rtype: dict
+        """
+        trajectory_errors = get_trajectory_errors(source_chain_positions, target_chain_positions, alignment)
+        chain_metrics = {
+            'trajectory_error': get_metric_value(trajectory_errors.max()),
+            'trajectory_error_mean': get_metric_value(trajectory_errors.mean()),
+            'joint_limit_violations': get_metric_value(get_joint_limit_violations(source_chain_positions, target_chain_positions)),
+            'foot_sliding': None,
+        }
+        if is_foot_chain:
+            chain_metrics['foot_sliding'] = get_metric_value(get_foot_sliding(
+                source_chain_positions[:, -1],
+                target_chain_positions[:, -1],
+                get_chain_length(source_chain_positions),
+                get_chain_length(target_chain_positions)
+            ))
+        return chain_metrics
+
+    def checkSequence(self, source_anim_sequence, target_anim_sequence, source_chain_bones, target_chain_bones, chain_mapping):
+        """Compare a retargeted AnimSequence with its source chain by chain.
+
+        :param source_anim_sequence: Loaded source AnimSequence uasset.
+        :type source_anim_sequence: :class:`unreal.AnimSequence`
+
+        :param target_anim_sequence: Loaded retargeted AnimSequence uasset.
+        :type target_anim_sequence: :class:`unreal.AnimSequence`
+
+        :param source_chain_bones: Source chain name to its start and end bone names.
+        :type source_chain_bones: dict
+
+        :param target_chain_bones: Target chain name to its start and end bone names.
+        :type target_chain_bones: dict
+
+        :param chain_mapping: Target chain name to source chain name pairs.
+        :type chain_mapping: dict
+
+        :return: Metrics of every target chain and the chains that went over a threshold.
+        :rtype: dict
+        """
+        sequence_length = min(
+            unreal.AnimationLibrary.get_sequence_length(source_anim_sequence),
+            unreal.AnimationLibrary.get_sequence_length(target_anim_sequence)
+        )
+        sample_times = np.linspace(0.0, sequence_length, self.sample_count)
+        mapped_chains = [
+            target_chain_name for target_chain_name, source_chain_name in chain_mapping.items()
+            if target_chain_name in target_chain_bones and source_chain_name in source_chain_bones
+        ]
+        source_positions = self.sampleChains(source_anim_sequence, {chain_mapping[chain_name]: source_chain_bones[chain_mapping[chain_name]] for chain_name in mapped_chains}, sample_times)
+        target_positions = self.sampleChains(target_anim_sequence, {chain_name: target_chain_bones[chain_name] for chain_name in mapped_chains}, sample_times)
+        alignment = self.getAlignment(source_anim_sequence, target_anim_sequence, source_chain_bones, target_chain_bones, chain_mapping, mapped_chains)
+
+        sequence_report = {'chains': collections.OrderedDict(), 'flagged_chains': collections.OrderedDict()}
+        for target_chain_name in mapped_chains:
+            source_chain_name = chain_mapping[target_chain_name]
+            if target_chain_name not in target_positions or source_chain_name not in source_positions:
+                continue
+            chain_metrics = self.getChainMetrics(
+                source_positions[source_chain_name],
+                target_positions[target_chain_name],
+                target_chain_name in self.foot_chain_names,
+                alignment
+            )
+            chain_metrics['source_chain'] = source_chain_name
+            sequence_report['chains'][target_chain_name] = chain_metrics
+            flagged_metrics = [
+                metric_name for metric_name, threshold in sorted(self.thresholds.items())
+                if chain_metrics.get(metric_name) is not None and chain_metrics[metric_name] > threshold
+            ]
+            if flagged_metrics:
+                sequence_report['flagged_chains'][target_chain_name] = flagged_metrics
+        sequence_report['flagged'] = bool(sequence_report['flagged_chains'])
+        return sequence_report
+
+    def main(self, source_ik_rig, target_ik_rig, ik_retargeter, source_asset_paths):
+        """Check every retargeted AnimSequence against the source AnimSequence it was retargeted from.
+
+        :param source_ik_rig: Path of the source IKRig.
+        :type source_ik_rig: str
+
+        :param target_ik_rig: Path of the target IKRig.
+        :type target_ik_rig: str
+
+        :param ik_retargeter: Path of the IKRetargeter the animations were retargeted with.
+        :type ik_retargeter: str
+
+        :param source_asset_paths: Path of every retargeted AnimSequence to the path of its source, as recorded by
+            the retarget batch.
+        :type source_asset_paths: dict
+
+        :return: Report of every retargeted AnimSequence and the paths of the ones that were flagged.
+        :rtype: dict
+        """
+        editor_asset_subsystem = unreal.get_editor_subsystem(unreal.EditorAssetSubsystem)
+        loaded_target_ik_rig = editor_asset_subsystem.load_asset(asset_path=target_ik_rig)
+        source_chain_bones = get_chain_bones(editor_asset_subsystem.load_asset(asset_path=source_ik_rig))
+        target_chain_bones = get_chain_bones(loaded_target_ik_rig)
+        chain_mapping = get_chain_mapping(editor_asset_subsystem.load_asset(asset_path=ik_retargeter), loaded_target_ik_rig)
+
+        quality_report = {'sequences': collections.OrderedDict(), 'flagged_sequences': [], 'thresholds': self.thresholds}
+        for target_asset_path, source_asset_path in source_asset_paths.items():
+            if not source_asset_path:
+                unreal.log_warning('The source of "{}" is unknown, skipping it...'.format(target_asset_path))
+                continue
+            source_anim_sequence = editor_asset_subsystem.load_asset(asset_path=source_asset_path)
+            target_anim_sequence = editor_asset_subsystem.load_asset(asset_path=target_asset_path)
+            if not source_anim_sequence or not target_anim_sequence:
+                unreal.log_warning('Could not load "{}" or its source "{}", skipping it...'.format(target_asset_path, source_asset_path))
+                continue
+            sequence_report = self.checkSequence(source_anim_sequence, target_anim_sequence, source_chain_bones, target_chain_bones, chain_mapping)
+            sequence_report['source'] = source_asset_path
+            quality_report['sequences'][target_asset_path] = sequence_report
+            if sequence_report['flagged']:
+                quality_report['flagged_sequences'].append(target_asset_path)
+                unreal.log_warning('Retarget quality check flagged "{}": {}'.format(target_asset_path, dict(sequence_report['flagged_chains'])))
+        return quality_report
@@ -1,11 +1,17 @@
 """Uses a IKRetargerer uasset to export animation from a source IKRig to a target IKRig."""
 
+import collections
+
 import unreal
 
+import asset_registry_access as ddara
+
 
 asset_tools = unreal.AssetToolsHelpers.get_asset_tools()
 editor_asset_subsystem = unreal.get_editor_subsystem(unreal.EditorAssetSubsystem)
 
+DEFAULT_SOURCE_ANIMATION_FOLDER = '/Game/Library/Packs/FluidFlux/Demo/Mannequin/Animations'
+
 
 class AnimationRetargeter(object):
     """Class used to create the IKRetargeter uasset."""
@@ -13,12 +19,12 @@ class AnimationRetargeter(object):
     def getAnimSequences(self):
         """Search content browser for available animations for transfer."""
         # Filter all uassets in specified folder to only retrieve uassets of class `unreal.AnimSequence`
-        anim_sequence_filter = unreal.ARFilter(
-            class_names=['AnimSequence'], 
-            package_paths=[self.source_ik_rig_animation_folder], 
+        # The folder is scanned first if the registry has not reached it yet
+        anim_sequences = ddara.asset_registry_access.getAssets(
+            package_paths=[self.source_ik_rig_animation_folder],
+            class_names=['AnimSequence'],
             recursive_classes=True
         )
-        anim_sequences = unreal.AssetRegistryHelpers.get_asset_registry().get_assets(anim_sequence_filter)
 
         # Loop through all anim sequences and only add unique entities to list
         self.unique_anim_sequences = []
@@ -26,6 +32,13 @@ class AnimationRetargeter(object):
             if 'Thriller_Part_2' in str(anim_sequence.get_editor_property('asset_name')):
                 if anim_sequence not in self.unique_anim_sequences:
                     self.unique_anim_sequences.append(anim_sequence)
+
+    def loadAnimSequences(self):
+        """Load every chosen source animation once and keep a reference so they stay resident between retargets."""
+        self.loaded_anim_sequences = [
+            editor_asset_subsystem.load_asset(asset_path=str(anim_sequence.package_name))
+            for anim_sequence in self.unique_anim_sequences
+        ]
     
     def batchRetargetAnimation(self):
         """Loop through all the chosen animation sequences and retarget them to the target mesh."""
@@ -43,19 +56,37 @@ class AnimationRetargeter(object):
 
     def moveAnimations(self):
         """Save all the retargeted animations to the correct "Animations" folder where it originated."""
+        self.destination_asset_paths = []
+        # The batch keeps asset names, so every duplicate maps back to the source it was retargeted from
+        source_package_names = {str(anim_sequence.asset_name): str(anim_sequence.package_name) for anim_sequence in self.unique_anim_sequences}
         for duplicated_animation in self.duplicated_animations:
             self.destination_asset_path = self.target_ik_rig_animation_folder + '/' + str(duplicated_animation.asset_name)
-            editor_asset_subsystem.rename_asset(source_asset_path=duplicated_animation.package_name, destination_asset_path=self.destination_asset_path)
+            # A rerun replaces the animation of the previous run instead of failing or leaving a "_1" copy next to it
+            if editor_asset_subsystem.does_asset_exist(self.destination_asset_path):
+                if not editor_asset_subsystem.delete_asset(self.destination_asset_path):
+                    raise RuntimeError('Could not replace "{}"'.format(self.destination_asset_path))
+            if not editor_asset_subsystem.rename_asset(source_asset_path=str(duplicated_animation.package_name), destination_asset_path=self.destination_asset_path):
+                raise RuntimeError('Could not move "{}" to "{}"'.format(duplicated_animation.package_name, self.destination_asset_path))
+            self.destination_asset_paths.append(self.destination_asset_path)
+            self.source_asset_paths[self.destination_asset_path] = source_package_names.get(str(duplicated_animation.asset_name))
 
-    def main(self, generated_ik_retargeter, target_base_folder):
+    def main(self, generated_ik_retargeter, target_base_folder, source_animation_folder=None):
         """Export animation from a source IKRig to a target IKRig.
         
         :param: Auto-generated IK Retargeter uasset.
         :type: :class:`unreal.IKRetargeter`
+
+        :param source_animation_folder: Folder to search for source animations, defaults to the Mannequin animations.
+        :type source_animation_folder: str
+
+        :return: Path of the last retargeted AnimSequence, every path is kept in ``destination_asset_paths`` and
+            ``source_asset_paths`` maps each of them to the source AnimSequence it was retargeted from.
+        :rtype: str
         """
         self.generated_ik_retargeter = generated_ik_retargeter
+        self.source_asset_paths = collections.OrderedDict()
         # Animation source folder to search through
-        self.source_ik_rig_animation_folder = '/Game/Library/Packs/FluidFlux/Demo/Mannequin/Animations'
+        self.source_ik_rig_animation_folder = source_animation_folder or DEFAULT_SOURCE_ANIMATION_FOLDER
         self.target_ik_rig_animation_folder = target_base_folder + '/Animations'
 
         self.getAnimSequences()
@@ -63,3 +94,65 @@ class AnimationRetargeter(object):
         self.moveAnimations()
 
         return self.destination_asset_path
+
+    def fanOut(self, retarget_targets, source_animation_folder=None, chunk_size=None, on_target_done=None):
+        """Export the same source animations to many target IKRigs, querying and loading the sources only once.
+
+        With a ``chunk_size`` the source animations are split into chunks and every chunk is sent to every target
+        before moving on to the next one, so only one chunk of retargeted animations is pending at a time.
+
+        :param retarget_targets: Pairs of auto-generated IK Retargeter uasset and the folder of its target mesh.
+        :type retarget_targets: list of tuple
+
+        :param source_animation_folder: Folder to search for source animations, defaults to the Mannequin animations.
+        :type source_animation_folder: str
+
+        :param chunk_size: Number of source animations sent to every target at a time, all of them when not given.
+        :type chunk_size: int
+
+        :param on_target_done: Called with the index of the target in ``retarget_targets`` and the paths retargeted
+            to it after every target and chunk, used to save and release memory between targets. The targets still
+            waiting for animations are in ``remaining_target_indices`` at that point.
+        :type on_target_done: callable
+
+        :return: Paths of the retargeted AnimSequences of every target, in the order of ``retarget_targets``,
+            ``source_asset_paths`` maps each of them to the source AnimSequence it was retargeted from.
+        :rtype: list of list of str
+        """
+        self.source_ik_rig_animation_folder = source_animation_folder or DEFAULT_SOURCE_ANIMATION_FOLDER
+        self.source_asset_paths = collections.OrderedDict()
+        self.getAnimSequences()
+        self.loadAnimSequences()
+
+        source_anim_sequences = self.unique_anim_sequences
+        self.source_package_names = [str(anim_sequence.package_name) for anim_sequence in source_anim_sequences]
+        chunk_size = chunk_size or len(source_anim_sequences) or 1
+        # Targets are told apart by their index, two targets may share a folder
+        destination_asset_paths_by_target = [[] for _ in retarget_targets]
+        # A target that fails is skipped for the remaining chunks so the other targets still get their animations
+        self.fan_out_errors = collections.OrderedDict()
+        for chunk_start in range(0, len(source_anim_sequences), chunk_size):
+            self.unique_anim_sequences = source_anim_sequences[chunk_start:chunk_start + chunk_size]
+            last_chunk = chunk_start + chunk_size >= len(source_anim_sequences)
+            for target_index, (generated_ik_retargeter, target_base_folder) in enumerate(retarget_targets):
+                if target_index in self.fan_out_errors:
+                    continue
+                self.generated_ik_retargeter = generated_ik_retargeter
+                self.target_ik_rig_animation_folder = target_base_folder + '/Animations'
+                # Targets that still get animations after this one, their assets must survive a collection
+                self.remaining_target_indices = [
+                    other_target_index for other_target_index in range(len(retarget_targets))
+                    if other_target_index not in self.fan_out_errors and (other_target_index > target_index or not last_chunk)
+                ]
+                try:
+                    self.batchRetargetAnimation()
+                    self.moveAnimations()
+                    if on_target_done:
+                        on_target_done(target_index, self.destination_asset_paths)
+                except Exception as error:
+                    unreal.log_error('Retargeting to "{}" failed: {}'.format(target_base_folder, error))
+                    self.fan_out_errors[target_index] = str(error)
+                    continue
+                destination_asset_paths_by_target[target_index].extend(self.destination_asset_paths)
+        self.unique_anim_sequences = source_anim_sequences
+        return destination_asset_paths_by_target
@@ -0,0 +1,120 @@
+"""Bind retargeted AnimSequences to a skeletal mesh binding inside a LevelSequence without needing it open in Sequencer."""
+
+import collections
+import math
+
+import unreal
+
+
+editor_asset_subsystem = unreal.get_editor_subsystem(unreal.EditorAssetSubsystem)
+
+# Fraction of a frame a clip length may run over before it takes another frame
+FRAME_TOLERANCE = 1e-4
+
+
+def muteControlRigTrack(skeletal_mesh_name, level_sequence):
+    """Find the ControlRigTrack and remove it so it doesn't overwrite animation.
+
+    :param skeletal_mesh_name: Name of the asset that is selected in the content browser.
+    :type skeletal_mesh_name: str
+
+    :param level_sequence: A LevelSequence.
+    :type level_sequence: :class:`LevelSequence`
+    """
+    binding_by_names_dict = {str(_bind.get_display_name()): _bind for _bind in level_sequence.get_bindings()}
+    actor_binding = binding_by_names_dict[skeletal_mesh_name]
+    for track in actor_binding.get_tracks():
+        if track.get_sections():
+            if track.get_class().get_name() == "MovieSceneControlRigParameterTrack":
+                actor_binding.remove_track(track)
+
+
+def setAnimationTrack(skeletal_mesh_name, level_sequence, cal_test_animation):
+    """Find the ControlRigTrack and remove it so it doesn't overwrite animation.
+
+    :param skeletal_mesh_name: Name of the asset that is selected in the content browser.
+    :type skeletal_mesh_name: str
+
+    :param level_sequence: A LevelSequence.
+    :type level_sequence: :class:`LevelSequence`
+
+    :param cal_test_animation: A AnimSequence.
+    :type cal_test_animation: :class:`AnimSequence`
+    """
+    binding_by_names_dict = {str(_bind.get_display_name()): _bind for _bind in level_sequence.get_bindings()}
+    actor_binding = binding_by_names_dict[skeletal_mesh_name]
+
+    animation_track = actor_binding.add_track(unreal.MovieSceneSkeletalAnimationTrack)
+    animation_section = animation_track.add_section()
+    animation_section.set_start_frame_bounded(True)
+    animation_section.set_end_frame_bounded(True)
+
+    loaded_anim_sequence = editor_asset_subsystem.load_asset(asset_path=cal_test_animation)
+    animation_section.get_editor_property('params').set_editor_property('animation', loaded_anim_sequence)
+
+
+def get_clip_frame_ranges(clip_lengths, display_rate):
+    """Compute back to back frame ranges so every clip plays one after another on a single track.
+
+    :param clip_lengths: Ordered pairs of clip name and clip length in seconds.
+    :type clip_lengths: list of tuple
+
+    :param display_rate: Display rate of the LevelSequence the clips are laid out in.
+    :type display_rate: :class:`unreal.FrameRate`
+
+    :return: Clip index of clip name to its (start frame, end frame) range, end frame is exclusive.
+    :rtype: :class:`collections.OrderedDict`
+    """
+    frames_per_second = float(display_rate.numerator) / float(display_rate.denominator)
+    clip_index = collections.OrderedDict()
+    start_frame = 0
+    for clip_name, clip_length in clip_lengths:
+        # Always give a clip at least one frame so zero length sequences do not collapse onto the next clip, and
+        # ignore float noise so a 31.0000001 frame clip takes 31 frames instead of leaving a gap before the next one
+        frame_count = max(1, int(math.ceil(clip_length * frames_per_second - FRAME_TOLERANCE)))
+        clip_index[clip_name] = (start_frame, start_frame + frame_count)
+        start_frame += frame_count
+    return clip_index
+
+
+def setAnimationTracks(skeletal_mesh_name, level_sequence, cal_test_animations):
+    """Lay every retargeted animation end to end on one SkeletalAnimationTrack so a single render covers the set.
+
+    :param skeletal_mesh_name: Name of the asset that is selected in the content browser.
+    :type skeletal_mesh_name: str
+
+    :param level_sequence: A LevelSequence.
+    :type level_sequence: :class:`LevelSequence`
+
+    :param cal_test_animations: AnimSequence paths in the order they should play.
+    :type cal_test_animations: list of str
+
+    :return: Clip index of AnimSequence name to its (start frame, end frame) range.
+    :rtype: :class:`collections.OrderedDict`
+    """
+    binding_by_names_dict = {str(_bind.get_display_name()): _bind for _bind in level_sequence.get_bindings()}
+    actor_binding = binding_by_names_dict[skeletal_mesh_name]
+
+    # Load every clip once up front since the sequence lengths are needed before any section is placed
+    loaded_anim_sequences = collections.OrderedDict()
+    for cal_test_animation in cal_test_animations:
+        loaded_anim_sequence = editor_asset_subsystem.load_asset(asset_path=cal_test_animation)
+        loaded_anim_sequences[cal_test_animation.split('/')[-1].split('.')[0]] = loaded_anim_sequence
+    clip_lengths = [
+        (anim_sequence_name, unreal.AnimationLibrary.get_sequence_length(loaded_anim_sequence))
+        for anim_sequence_name, loaded_anim_sequence in loaded_anim_sequences.items()
+    ]
+    clip_index = get_clip_frame_ranges(clip_lengths, level_sequence.get_display_rate())
+
+    animation_track = actor_binding.add_track(unreal.MovieSceneSkeletalAnimationTrack)
+    for anim_sequence_name, loaded_anim_sequence in loaded_anim_sequences.items():
+        start_frame, end_frame = clip_index[anim_sequence_name]
+        animation_section = animation_track.add_section()
+        animation_section.set_range(start_frame, end_frame)
+        animation_section.get_editor_property('params').set_editor_property('animation', loaded_anim_sequence)
+
+    # Stretch the playback range so the render covers every clip
+    if clip_index:
+        level_sequence.set_playback_start(0)
+        level_sequence.set_playback_end(list(clip_index.values())[-1][1])
+    return clip_index
@@ -2,6 +2,7 @@
 
 import os
 import sys
+import traceback
 
 import unreal
 
@@ -14,15 +15,25 @@ if sys.version_info.major == 3:
     from importlib import reload
     sys.path.insert(0, r"R:\Production\Tools\0_Vault\it_tools\tools_config\SYSTEM\SOFTWARE\PYTHON\3.10.4\Windows_NT.x64\Lib\site-packages")
 
+import asset_registry_access as ddara
 import create_ik_rig as ddcir
 import create_ik_retargeter as ddcirt
+import ik_rig_result_store as ddirs
+import pipeline_stage_graph as ddpsg
+import retarget_quality_check as ddrqc
 import retargeter_animation_transfer as ddrat
+import sequencer_animation_tracks as ddsat
 sys.path.insert(0,r"C:\DD_Dev\common\python\dd_unreal")
 import unreal_scripting_setup_turntable as usst
 import unreal_scripting_lib_source_control as ussc
+# ddara is not reloaded on purpose, a reload would orphan its tick callback and forget the paths it already scanned
 reload(ddcir)
 reload(ddcirt)
+reload(ddirs)
+reload(ddpsg)
+reload(ddrqc)
 reload(ddrat)
+reload(ddsat)
 reload(usst)
 reload(ussc)
 
@@ -42,78 +53,175 @@ def findBaseActor():
     return base_actor
 
 
-def muteControlRigTrack(skeletal_mesh_name, level_sequence):
-    """Find the ControlRigTrack and remove it so it doesn't overwrite animation.
+def assetsExist(asset_paths):
+    """Check cached stage outputs still point at assets that exist in the content browser.
 
-    :param skeletal_mesh_name: Name of the asset that is selected in the content browser.
-    :type skeletal_mesh_name: str
+    :param asset_paths: Unreal paths of the assets a stage produced.
+    :type asset_paths: list of str
 
-    :param level_sequence: A LevelSequence.
-    :type level_sequence: :class:`LevelSequence`
+    :return: True if every asset still exists.
+    :rtype: bool
     """
-    binding_by_names_dict = {str(_bind.get_display_name()): _bind for _bind in level_sequence.get_bindings()}
-    actor_binding = binding_by_names_dict[skeletal_mesh_name]
-    for track in actor_binding.get_tracks():
-        if track.get_sections():
-            if track.get_class().get_name() == "MovieSceneControlRigParameterTrack":
-                actor_binding.remove_track(track)
+    return all(unreal.EditorAssetLibrary.does_asset_exist(asset_path) for asset_path in asset_paths)
 
 
-def setAnimationTrack(skeletal_mesh_name, level_sequence, cal_test_animation):
-    """Find the ControlRigTrack and remove it so it doesn't overwrite animation.
+def createIkRig(skeletal_mesh, result_store_folder):
+    """Create and save the IKRig of a skeletal mesh.
 
-    :param skeletal_mesh_name: Name of the asset that is selected in the content browser.
-    :type skeletal_mesh_name: str
+    :param skeletal_mesh: Full unreal filepath to the skeletal mesh uasset.
+    :type skeletal_mesh: str
 
-    :param level_sequence: A LevelSequence.
-    :type level_sequence: :class:`LevelSequence`
+    :param result_store_folder: Shared folder to pull and publish generated IKRig specs.
+    :type result_store_folder: str
 
-    :param cal_test_animation: A AnimSequence.
-    :type cal_test_animation: :class:`AnimSequence`
+    :return: Path of the IKRig and the chain specs it was generated with.
+    :rtype: tuple
     """
-    binding_by_names_dict = {str(_bind.get_display_name()): _bind for _bind in level_sequence.get_bindings()}
-    actor_binding = binding_by_names_dict[skeletal_mesh_name]
+    result_store = ddirs.IKRigResultStore(result_store_folder) if result_store_folder else None
+    createIKRig = ddcir.CreateIKRig()
+    generated_ik_rig = createIKRig.main(skeletal_mesh, ddcir.get_asset_root(skeletal_mesh), result_store=result_store)
+    ussc.saveAssetsLocally([str(generated_ik_rig)], sc_state_to_expect_is_enabled=True)
+    return generated_ik_rig.get_path_name(), createIKRig.chain_specs
 
-    animation_track = actor_binding.add_track(unreal.MovieSceneSkeletalAnimationTrack)
-    animation_section = animation_track.add_section()
-    animation_section.set_start_frame_bounded(True)
-    animation_section.set_end_frame_bounded(True)
 
-    loaded_anim_sequence = editor_asset_subsystem.load_asset(asset_path=cal_test_animation)
-    animation_section.get_editor_property('params').set_editor_property('animation', loaded_anim_sequence)
+def createSourceIkRigStage(source_skeletal_mesh, result_store_folder):
+    """Create and save the source IKRig.
 
+    :return: Path of the source IKRig and the chain specs it was generated with.
+    :rtype: dict
+    """
+    source_ik_rig, source_chain_specs = createIkRig(source_skeletal_mesh, result_store_folder)
+    return {'source_ik_rig': source_ik_rig, 'source_chain_specs': source_chain_specs}
 
-def main(skeletal_mesh_name, asset_prefix, asset_type, skeletal_mesh_root_folder, asset_shortname):
-    """Initializes all of the classes required to transfer animation loops between skeletal meshes.
 
-    :param skeletal_mesh_name: Name of the asset that is selected in the content browser.
-    :type skeletal_mesh_name: str
+def createTargetIkRigStage(target_skeletal_mesh, result_store_folder):
+    """Create and save the target IKRig.
 
-    :param skeletal_mesh_root_folder: Root folder that the selected asset exists in.
-    :type skeletal_mesh_root_folder: str
+    :return: Path of the target IKRig and the chain specs it was generated with.
+    :rtype: dict
     """
-    source_skeletal_mesh = '/Game/Library/Packs/FluidFlux/Demo/Mannequin/Mesh/SK_Mannequin.SK_Mannequin'
-    target_skeletal_mesh = '{skeletal_mesh_root_folder}/{skeletal_mesh_name}.{skeletal_mesh_name}'.format(skeletal_mesh_root_folder=skeletal_mesh_root_folder, skeletal_mesh_name=skeletal_mesh_name)
+    target_ik_rig, target_chain_specs = createIkRig(target_skeletal_mesh, result_store_folder)
+    return {'target_ik_rig': target_ik_rig, 'target_chain_specs': target_chain_specs}
 
-    # Initializes the IKRig creation class
-    createIKRig = ddcir.CreateIKRig()
-    if source_skeletal_mesh:
-        source_skeletal_mesh_root_folder = ddcir.get_asset_root(source_skeletal_mesh)
-        generated_source_ik_rig = createIKRig.main(source_skeletal_mesh, source_skeletal_mesh_root_folder)
-        ussc.saveAssetsLocally([str(generated_source_ik_rig)], sc_state_to_expect_is_enabled=True)
-    if target_skeletal_mesh:
-        target_skeletal_mesh_root_folder = ddcir.get_asset_root(target_skeletal_mesh)
-        generated_target_ik_rig = createIKRig.main(target_skeletal_mesh, target_skeletal_mesh_root_folder)
-        ussc.saveAssetsLocally([str(generated_target_ik_rig)], sc_state_to_expect_is_enabled=True)
-
-    # Initialize the Retargeter generator and return generated IKRetargeter uasset
+
+def createIkRetargeterStage(source_skeletal_mesh, target_skeletal_mesh, source_ik_rig, target_ik_rig, source_chain_specs, target_chain_specs, result_store_folder):
+    """Create and save the IKRetargeter between the source and target IKRigs.
+
+    The IKRigs are looked up next to their skeletal meshes, their paths are only taken so the stage reruns with them.
+
+    :param source_skeletal_mesh: Full unreal filepath to the source skeletal mesh uasset.
+    :type source_skeletal_mesh: str
+
+    :param target_skeletal_mesh: Full unreal filepath to the target skeletal mesh uasset.
+    :type target_skeletal_mesh: str
+
+    :param source_ik_rig: Path of the source IKRig.
+    :type source_ik_rig: str
+
+    :param target_ik_rig: Path of the target IKRig.
+    :type target_ik_rig: str
+
+    :param source_chain_specs: Chain dicts generated for the source IKRig.
+    :type source_chain_specs: list of dict
+
+    :param target_chain_specs: Chain dicts generated for the target IKRig.
+    :type target_chain_specs: list of dict
+
+    :param result_store_folder: Shared folder to pull and publish generated IKRetargeter specs.
+    :type result_store_folder: str
+
+    :return: Path of the IKRetargeter.
+    :rtype: dict
+    """
+    result_store = ddirs.IKRigResultStore(result_store_folder) if result_store_folder else None
     createIKRetargeter = ddcirt.CreateIKRetargeter()
-    generated_ik_retargeter = createIKRetargeter.main(source_skeletal_mesh, target_skeletal_mesh)
+    generated_ik_retargeter = createIKRetargeter.main(
+        source_skeletal_mesh, 
+        target_skeletal_mesh, 
+        result_store=result_store, 
+        chain_mapping_mode='exact', 
+        source_chain_specs=source_chain_specs, 
+        target_chain_specs=target_chain_specs
+    )
     ussc.saveAssetsLocally([str(generated_ik_retargeter)], sc_state_to_expect_is_enabled=True)
+    return {'ik_retargeter': generated_ik_retargeter.get_path_name()}
+
+
+def transferAnimationStage(ik_retargeter, skeletal_mesh_root_folder):
+    """Batch retarget the source animations onto the target skeleton.
+
+    :param ik_retargeter: Path of the IKRetargeter.
+    :type ik_retargeter: str
+
+    :param skeletal_mesh_root_folder: Root folder that the selected asset exists in.
+    :type skeletal_mesh_root_folder: str
 
-    # Use the generated retargeter and batch all the animations to the new skeleton
+    :return: Paths of the retargeted AnimSequences and the path of the source of each of them.
+    :rtype: dict
+    """
     animationRetargeter = ddrat.AnimationRetargeter()
-    cal_test_animation = animationRetargeter.main(generated_ik_retargeter=generated_ik_retargeter, target_base_folder=skeletal_mesh_root_folder)
+    animationRetargeter.main(generated_ik_retargeter=editor_asset_subsystem.load_asset(asset_path=ik_retargeter), target_base_folder=skeletal_mesh_root_folder)
+    return {
+        'cal_test_animations': animationRetargeter.destination_asset_paths,
+        'cal_test_animation_sources': animationRetargeter.source_asset_paths,
+    }
+
+
+def qualityCheckStage(source_ik_rig, target_ik_rig, ik_retargeter, cal_test_animation_sources):
+    """Compare the retargeted animations with their source animations and flag the ones that look broken.
+
+    A check that fails reports its error instead of raising, the turntable must not depend on it.
+
+    :param source_ik_rig: Path of the source IKRig.
+    :type source_ik_rig: str
+
+    :param target_ik_rig: Path of the target IKRig.
+    :type target_ik_rig: str
+
+    :param ik_retargeter: Path of the IKRetargeter.
+    :type ik_retargeter: str
+
+    :param cal_test_animation_sources: Path of every retargeted AnimSequence to the path of its source.
+    :type cal_test_animation_sources: dict
+
+    :return: Quality report of every retargeted AnimSequence, or the error the check failed with.
+    :rtype: dict
+    """
+    try:
+        retargetQualityCheck = ddrqc.RetargetQualityCheck()
+        quality_report = retargetQualityCheck.main(
+            source_ik_rig=source_ik_rig,
+            target_ik_rig=target_ik_rig,
+            ik_retargeter=ik_retargeter,
+            source_asset_paths=cal_test_animation_sources
+        )
+    except Exception as error:
+        unreal.log_error('Retarget quality check failed: {}'.format(error))
+        quality_report = {'error': str(error), 'sequences': {}, 'flagged_sequences': []}
+    return {'quality_report': quality_report}
+
+
+def setupTurntableStage(skeletal_mesh_name, asset_prefix, asset_type, skeletal_mesh_root_folder, asset_shortname, cal_test_animations, assemble_all_clips):
+    """Duplicate the Calisthenics turntable for the asset and bind the retargeted animation to its skeletal mesh.
+
+    The copied level is opened as part of the copy, so the copy and the binding always run together.
+
+    :param skeletal_mesh_name: Name of the asset that is selected in the content browser.
+    :type skeletal_mesh_name: str
+
+    :param skeletal_mesh_root_folder: Root folder that the selected asset exists in.
+    :type skeletal_mesh_root_folder: str
+
+    :param cal_test_animations: Paths of the retargeted AnimSequences.
+    :type cal_test_animations: list of str
+
+    :param assemble_all_clips: Lay every retargeted clip end to end on one track instead of only the last one.
+    :type assemble_all_clips: bool
+
+    :return: Clip index of AnimSequence name to its (start frame, end frame) range when assembling all clips.
+    :rtype: dict
+    """
+    clip_index = None
 
     # Duplicate the level and sequence from the Calisthenics default
     usst.performCopyTTForAsset(
@@ -133,20 +241,208 @@ def main(skeletal_mesh_name, asset_prefix, asset_type, skeletal_mesh_root_folder
     level_sequence = unreal.LevelSequenceEditorBlueprintLibrary.get_current_level_sequence()
     if skeletal_mesh_actor and level_sequence:
         level_sequence_editor_subsystem.add_actors(skeletal_mesh_actor)
-        muteControlRigTrack(
+        ddsat.muteControlRigTrack(
             skeletal_mesh_name=skeletal_mesh_name, 
             level_sequence=level_sequence
         )
-        setAnimationTrack(
-            skeletal_mesh_name=skeletal_mesh_name, 
-            level_sequence=level_sequence, 
-            cal_test_animation=cal_test_animation
+        if assemble_all_clips:
+            clip_index = ddsat.setAnimationTracks(
+                skeletal_mesh_name=skeletal_mesh_name, 
+                level_sequence=level_sequence, 
+                cal_test_animations=cal_test_animations
+            )
+            for clip_name, frame_range in clip_index.items():
+                unreal.log('Clip "{}" plays from frame {} to {}'.format(clip_name, frame_range[0], frame_range[1]))
+        else:
+            ddsat.setAnimationTrack(
+                skeletal_mesh_name=skeletal_mesh_name, 
+                level_sequence=level_sequence, 
+                cal_test_animation=cal_test_animations[-1]
+            )
+    return {'clip_index': clip_index}
+
+
+def build_pipeline_graph(cache_path=None):
+    """Describe the pipeline as stages so a retry only reruns the stages whose inputs changed or failed.
+
+    Every stage talks to the editor, which is only safe from the game thread, so the graph runs them one after the
+    other.
+
+    :param cache_path: Json file stage outputs are cached in between runs.
+    :type cache_path: str
+
+    :return: Pipeline stage graph.
+    :rtype: :class:`pipeline_stage_graph.StageGraph`
+    """
+    pipeline_graph = ddpsg.StageGraph(cache_path=cache_path)
+    pipeline_graph.addStage(ddpsg.Stage(
+        name='source_ik_rig',
+        function=createSourceIkRigStage,
+        inputs=['source_skeletal_mesh', 'result_store_folder'],
+        outputs=['source_ik_rig', 'source_chain_specs'],
+        version=ddirs.TOOL_VERSION,
+        is_valid=lambda outputs: assetsExist([outputs['source_ik_rig']])
+    ))
+    pipeline_graph.addStage(ddpsg.Stage(
+        name='target_ik_rig',
+        function=createTargetIkRigStage,
+        inputs=['target_skeletal_mesh', 'result_store_folder'],
+        outputs=['target_ik_rig', 'target_chain_specs'],
+        version=ddirs.TOOL_VERSION,
+        is_valid=lambda outputs: assetsExist([outputs['target_ik_rig']])
+    ))
+    pipeline_graph.addStage(ddpsg.Stage(
+        name='ik_retargeter',
+        function=createIkRetargeterStage,
+        inputs=['source_skeletal_mesh', 'target_skeletal_mesh', 'source_ik_rig', 'target_ik_rig', 'source_chain_specs', 'target_chain_specs', 'result_store_folder'],
+        outputs=['ik_retargeter'],
+        version=ddirs.TOOL_VERSION,
+        is_valid=lambda outputs: assetsExist([outputs['ik_retargeter']])
+    ))
+    pipeline_graph.addStage(ddpsg.Stage(
+        name='animation_transfer',
+        function=transferAnimationStage,
+        inputs=['ik_retargeter', 'skeletal_mesh_root_folder'],
+        outputs=['cal_test_animations', 'cal_test_animation_sources'],
+        version='2',
+        is_valid=lambda outputs: assetsExist(outputs['cal_test_animations'])
+    ))
+    # The quality check needs numpy, which not every editor Python has, without it artists still get a turntable
+    if ddrqc.np is not None:
+        pipeline_graph.addStage(ddpsg.Stage(
+            name='quality_check',
+            function=qualityCheckStage,
+            inputs=['source_ik_rig', 'target_ik_rig', 'ik_retargeter', 'cal_test_animation_sources'],
+            outputs=['quality_report'],
+            # A failed check is retried on the next run instead of being served from the cache
+            is_valid=lambda outputs: 'error' not in outputs['quality_report']
+        ))
+    else:
+        unreal.log_warning('numpy is not installed, skipping the retarget quality check...')
+    pipeline_graph.addStage(ddpsg.Stage(
+        name='turntable',
+        function=setupTurntableStage,
+        inputs=['skeletal_mesh_name', 'asset_prefix', 'asset_type', 'skeletal_mesh_root_folder', 'asset_shortname', 'cal_test_animations', 'assemble_all_clips'],
+        outputs=['clip_index'],
+        # Never served from the cache, copying the turntable is what opens the level and sequence for the artist
+        is_valid=lambda outputs: False
+    ))
+    return pipeline_graph
+
+
+def main(skeletal_mesh_name, asset_prefix, asset_type, skeletal_mesh_root_folder, asset_shortname, assemble_all_clips=False, result_store_folder=None, rerun_stages=None):
+    """Initializes all of the classes required to transfer animation loops between skeletal meshes.
+
+    :param skeletal_mesh_name: Name of the asset that is selected in the content browser.
+    :type skeletal_mesh_name: str
+
+    :param skeletal_mesh_root_folder: Root folder that the selected asset exists in.
+    :type skeletal_mesh_root_folder: str
+
+    :param assemble_all_clips: Lay every retargeted clip end to end on one track instead of only the last one.
+    :type assemble_all_clips: bool
+
+    :param result_store_folder: Shared folder to pull and publish generated IKRig and IKRetargeter specs.
+    :type result_store_folder: str
+
+    :param rerun_stages: Names of pipeline stages to run even if their cached outputs are still valid.
+    :type rerun_stages: list of str
+
+    :return: Clip index of AnimSequence name to its (start frame, end frame) range when assembling all clips.
+    :rtype: dict
+    """
+    source_skeletal_mesh = '/Game/Library/Packs/FluidFlux/Demo/Mannequin/Mesh/SK_Mannequin.SK_Mannequin'
+    target_skeletal_mesh = '{skeletal_mesh_root_folder}/{skeletal_mesh_name}.{skeletal_mesh_name}'.format(skeletal_mesh_root_folder=skeletal_mesh_root_folder, skeletal_mesh_name=skeletal_mesh_name)
+
+    # Cache stage outputs per target so a retry after a late failure picks up where it stopped, the cache mirrors the
+    # package path of the target so meshes with the same name in different folders never share a cache
+    cache_path = os.path.join(
+        unreal.Paths.convert_relative_path_to_full(unreal.Paths.project_saved_dir()),
+        'AutoIKRetargeter',
+        *target_skeletal_mesh.split('.')[0].strip('/').split('/')
+    ) + '.json'
+    pipeline_graph = build_pipeline_graph(cache_path)
+    pipeline_values = pipeline_graph.run(
+        {
+            'skeletal_mesh_name': skeletal_mesh_name,
+            'asset_prefix': asset_prefix,
+            'asset_type': asset_type,
+            'skeletal_mesh_root_folder': skeletal_mesh_root_folder,
+            'asset_shortname': asset_shortname,
+            'assemble_all_clips': assemble_all_clips,
+            'result_store_folder': result_store_folder,
+            'source_skeletal_mesh': source_skeletal_mesh,
+            'target_skeletal_mesh': target_skeletal_mesh,
+        },
+        rerun_stages=rerun_stages
+    )
+    for stage_name, stage_state in pipeline_graph.stage_states.items():
+        unreal.log('Stage "{}": {}'.format(stage_name, stage_state))
+    for flagged_sequence in pipeline_values.get('quality_report', {}).get('flagged_sequences', []):
+        unreal.log_warning('Check "{}" before rendering, the retarget quality check flagged it'.format(flagged_sequence))
+    return pipeline_values['clip_index']
+
+
+def main_reporting_errors(skeletal_mesh_name, asset_prefix, asset_type, skeletal_mesh_root_folder, asset_shortname, assemble_all_clips=False, result_store_folder=None, rerun_stages=None):
+    """Run :func:`main` from an editor tick and tell the artist when it fails, an error raised in a tick is easy to miss.
+
+    Takes the same arguments as :func:`main`.
+
+    :return: Clip index returned by :func:`main`, None when it failed.
+    :rtype: dict
+    """
+    try:
+        return main(skeletal_mesh_name, asset_prefix, asset_type, skeletal_mesh_root_folder, asset_shortname, assemble_all_clips, result_store_folder, rerun_stages)
+    except Exception:
+        unreal.log_error(traceback.format_exc())
+        unreal.EditorDialog.show_message(
+            'Auto IK Retargeter',
+            'Creating the cal test for "{}" failed, see the Output Log for details.'.format(skeletal_mesh_name),
+            unreal.AppMsgType.OK
         )
+        return None
+
+def get_job_arguments(job_environment):
+    """Read the arguments of :func:`main` from the environment variables describing a job.
+
+    :param job_environment: Job environment variables, ``os.environ`` when run by hand.
+    :type job_environment: dict
+
+    :return: Positional arguments for :func:`main`.
+    :rtype: tuple
+    """
+    return (
+        job_environment.get("SKELETAL_MESH_NAME"),
+        job_environment["ASSET_PREFIX"],
+        job_environment["ASSET_TYPE"],
+        job_environment.get("SKELETAL_MESH_ROOT_FOLDER"),
+        job_environment["ASSET_SHORTNAME"],
+        job_environment.get("ASSEMBLE_ALL_CLIPS", "") == "1",
+        job_environment.get("IK_RIG_RESULT_STORE"),
+        [stage_name for stage_name in job_environment.get("RERUN_STAGES", "").split(",") if stage_name],
+    )
+
+
+def run_remote_job(job_environment):
+    """Run a job sent by ``launch_ik_rig_creation_remotely`` to the end before the remote command returns.
+
+    The job is passed in instead of read from ``os.environ``, the editor outlives the job and must not keep its
+    variables around for the next remote or hand started run.
+
+    :param job_environment: Job environment variables forwarded by the launcher.
+    :type job_environment: dict
+
+    :return: Clip index returned by :func:`main`.
+    :rtype: dict
+    """
+    # On a freshly started editor the registry may still be scanning, the source animations must be indexed first
+    ddara.asset_registry_access.ensurePathsReady([ddrat.DEFAULT_SOURCE_ANIMATION_FOLDER])
+    return main(*get_job_arguments(job_environment))
 
 if __name__ == "__main__":
-    skeletal_mesh_name = os.environ.get("SKELETAL_MESH_NAME")
-    asset_prefix = os.environ["ASSET_PREFIX"]
-    asset_type = os.environ["ASSET_TYPE"]
-    skeletal_mesh_root_folder = os.environ.get("SKELETAL_MESH_ROOT_FOLDER")
-    asset_shortname = os.environ["ASSET_SHORTNAME"]
-    main(skeletal_mesh_name, asset_prefix, asset_type, skeletal_mesh_root_folder, asset_shortname)
+    # Run by hand in the editor, keep the editor responsive and start once the source animations are indexed
+    job_arguments = get_job_arguments(os.environ)
+    ddara.asset_registry_access.whenPathsReady(
+        [ddrat.DEFAULT_SOURCE_ANIMATION_FOLDER],
+        lambda: main_reporting_errors(*job_arguments)
+    )